@@ -1,8 +1,10 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.template.defaultfilters import filesizeformat
 from .models import (
     User, Product, ProductImage, Offer, Order, OrderItem,
-    Wishlist, Review, ProductLike, ProductView
+    Wishlist, Review, ProductLike, ProductView, ProductViewDaily,
+    DailySales, DailyProductSales
 )
 
 
@@ -28,18 +30,42 @@ class ProductImageInline(admin.TabularInline):
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     """Product admin"""
-    list_display = ['name', 'category', 'material', 'price', 'stock', 'availability', 'likes', 'views']
-    list_filter = ['category', 'material', 'availability']
+    list_display = [
+        'name', 'category', 'material', 'price', 'effective_price', 'stock',
+        'availability', 'likes', 'views', 'model_3d_sizes'
+    ]
+    list_filter = ['category', 'material', 'availability', 'model_3d_status']
     search_fields = ['name', 'description']
     inlines = [ProductImageInline]
-    readonly_fields = ['likes', 'views', 'rating', 'review_count', 'created_at', 'updated_at']
+    readonly_fields = [
+        'likes', 'views', 'rating', 'review_count', 'rating_total',
+        'active_offer', 'effective_price', 'model_3d_status', 'model_3d_sizes',
+        'created_at', 'updated_at'
+    ]
+    
+    @admin.display(description='3D model size')
+    def model_3d_sizes(self, obj):
+        """Original vs optimized size of the product's 3D model"""
+        variants = obj.model_3d_variants
+        if obj.model_3d_status == Product.ModelStatus.READY:
+            original, optimized = variants['original_size'], variants['optimized_size']
+            saved = 1 - optimized / original if original else 0
+            return (
+                f'{filesizeformat(original)} → {filesizeformat(optimized)} '
+                f'(-{saved:.0%}), preview {filesizeformat(variants["preview_size"])}'
+            )
+        if obj.model_3d_status == Product.ModelStatus.FAILED:
+            return f"Not optimized: {variants.get('error', '')}"
+        if obj.model_3d_status == Product.ModelStatus.PENDING:
+            return 'Waiting for optimize_models'
+        return '-'
 
 
 @admin.register(Offer)
 class OfferAdmin(admin.ModelAdmin):
     """Offer admin"""
-    list_display = ['title', 'discount_percentage', 'start_date', 'end_date', 'active']
-    list_filter = ['active', 'start_date', 'end_date']
+    list_display = ['title', 'discount_percentage', 'start_date', 'end_date', 'active', 'is_live']
+    list_filter = ['active', 'is_live', 'start_date', 'end_date']
     search_fields = ['title', 'description']
     filter_horizontal = ['products']
 
@@ -91,5 +117,35 @@ class ProductViewAdmin(admin.ModelAdmin):
     """Product view admin"""
     list_display = ['product', 'user', 'ip_address', 'viewed_at']
     list_filter = ['viewed_at']
+    list_select_related = ['product', 'user']
     search_fields = ['product__name', 'user__username', 'ip_address']
     readonly_fields = ['viewed_at']
+    # Skip the extra COUNT(*) over the whole view log
+    show_full_result_count = False
+
+
+@admin.register(ProductViewDaily)
+class ProductViewDailyAdmin(admin.ModelAdmin):
+    """Product view daily summary admin"""
+    list_display = ['product', 'date', 'views', 'unique_ips', 'unique_users']
+    list_filter = ['date']
+    list_select_related = ['product']
+    search_fields = ['product__name']
+    readonly_fields = ['product', 'date', 'views', 'unique_ips', 'unique_users']
+
+
+@admin.register(DailySales)
+class DailySalesAdmin(admin.ModelAdmin):
+    """Daily sales rollup admin"""
+    list_display = ['date', 'order_count', 'revenue']
+    date_hierarchy = 'date'
+    readonly_fields = ['date', 'order_count', 'revenue']
+
+
+@admin.register(DailyProductSales)
+class DailyProductSalesAdmin(admin.ModelAdmin):
+    """Daily product sales rollup admin"""
+    list_display = ['date', 'product', 'quantity', 'revenue']
+    list_filter = ['date']
+    search_fields = ['product__name']
+    readonly_fields = ['date', 'product', 'quantity', 'revenue']
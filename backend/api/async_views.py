@@ -0,0 +1,82 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.views.decorators.csrf import csrf_exempt
+
+from .views import CustomTokenObtainPairView, OfferViewSet, ProductViewSet, UserViewSet
+
+_executor = None
+
+
+def get_hash_executor():
+    """Thread pool bounding how many password hashes run at once"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            thread_name_prefix='password-hash'
+        )
+    return _executor
+
+
+def _run_view(view, request, *args, **kwargs):
+    # Pool threads outlive requests, so manage their connections the way
+    # the request handler would
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def offload(view):
+    """
+    Wrap a sync DRF view into an async view that runs it in the password
+    hashing pool. Under ASGI the event loop keeps serving catalog requests
+    while logins wait for a hashing slot, instead of every worker being
+    pinned on PBKDF2 during a login burst.
+    """
+    @csrf_exempt
+    @functools.wraps(view)
+    async def async_view(request, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_hash_executor(),
+            functools.partial(_run_view, view, request, *args, **kwargs)
+        )
+    return async_view
+
+
+async_login = offload(CustomTokenObtainPairView.as_view())
+async_register = offload(UserViewSet.as_view({'post': 'register'}))
+
+
+# Async catalog reads
+#
+# The catalog views run unchanged (authentication, catalog cache, replica
+# routing) in a worker thread, so the event loop keeps accepting requests
+# while they wait on the database. Writes on the same URLs go through too.
+
+def in_thread(view):
+    """Wrap a sync DRF view into an async view that runs it in a worker thread"""
+    @csrf_exempt
+    @functools.wraps(view)
+    async def async_view(request, *args, **kwargs):
+        return await sync_to_async(_run_view, thread_sensitive=False)(
+            view, request, *args, **kwargs
+        )
+    return async_view
+
+
+async_product_list = in_thread(ProductViewSet.as_view({'get': 'list', 'post': 'create'}))
+async_product_detail = in_thread(ProductViewSet.as_view({
+    'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'
+}))
+async_active_offers = in_thread(OfferViewSet.as_view({'get': 'active'}))
@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+
+def state_cache_key(user_id):
+    return f'auth:user-state:{user_id}'
+
+
+def get_user_state(user_id):
+    """
+    (is_active, role) for a user, cached for AUTH_STATE_CACHE_SECONDS and
+    dropped by signals when the user changes, so deactivation and role
+    changes apply to tokens that were issued before them.
+    """
+    key = state_cache_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        row = User.objects.filter(pk=user_id).values_list('is_active', 'role').first()
+        state = row or (False, None)
+        cache.set(key, state, timeout=settings.AUTH_STATE_CACHE_SECONDS)
+    return state
+
+
+def forget_user_state(user_id):
+    cache.delete(state_cache_key(user_id))
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    Lightweight user built from access token claims.
+
+    `id`, `pk`, `role`, `is_active` and the authentication flags are
+    answered from the claims, so permission checks never touch the
+    database. Anything else (e.g. serializing the user or assigning it to a
+    foreign key) loads the real User row on first use.
+    """
+
+    def __init__(self, user_id, role, is_active):
+        super().__init__(lambda: User.objects.get(pk=user_id))
+        self.__dict__['_claims'] = {'id': user_id, 'role': role, 'is_active': is_active}
+
+    def __bool__(self):
+        return True
+
+    @property
+    def id(self):
+        return self.__dict__['_claims']['id']
+
+    @property
+    def pk(self):
+        return self.__dict__['_claims']['id']
+
+    @property
+    def role(self):
+        return self.__dict__['_claims']['role']
+
+    @property
+    def is_active(self):
+        return self.__dict__['_claims']['is_active']
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the `role` and `is_active` claims instead
+    of loading the user on every request. A short-lived per-user state cache
+    still rejects deactivated users and applies role changes.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        if 'role' not in validated_token:
+            # Token issued before claims were added, fall back to a lookup
+            return super().get_user(validated_token)
+
+        is_active, role = get_user_state(user_id)
+        if not is_active or not validated_token.get('is_active', True):
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+
+        return ClaimsUser(user_id, role or validated_token['role'], is_active)
@@ -0,0 +1,39 @@
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from .models import User
+
+
+class EmailOrUsernameBackend(ModelBackend):
+    """
+    Authenticate with either a username or an email address in one query.
+
+    Emails are matched on LOWER(email) with the same `email <> ''`
+    condition as the partial unique index on User, so the planner can use
+    that index and the lookup stays an index probe as the table grows.
+
+    A username match wins if a username happens to equal another user's
+    email.
+    """
+
+    def authenticate(self, request, username=None, password=None, email=None, **kwargs):
+        login = username or email
+        if not login or password is None:
+            return None
+
+        candidates = list(
+            User.objects.alias(email_lower=Lower('email'))
+            .filter(Q(username=login) | (Q(email_lower=login.lower()) & ~Q(email='')))[:2]
+        )
+        candidates.sort(key=lambda user: user.username != login)
+        if not candidates:
+            # Run the hasher once anyway so unknown logins take as long as
+            # wrong passwords
+            User().set_password(password)
+            return None
+
+        user = candidates[0]
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,291 @@
+import csv
+import io
+import json
+from collections import defaultdict
+
+from django.db import DatabaseError, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from rest_framework import serializers
+
+from .cache import invalidate_catalog
+from .models import Product, ProductImage
+from .pricing import refresh_effective_prices
+
+FORMATS = ('csv', 'jsonl')
+FIELDS = [
+    'sku', 'name', 'description', 'price', 'original_price',
+    'category', 'material', 'availability', 'stock'
+]
+COLUMNS = FIELDS + ['images']
+# Image URLs share one CSV cell
+IMAGE_SEPARATOR = '|'
+# Per-row errors reported back, beyond this only the count is kept
+MAX_REPORTED_ERRORS = 1000
+
+
+class ProductImportSerializer(serializers.ModelSerializer):
+    """One row of a bulk product import"""
+    # Plain field: existing SKUs are updated, not rejected as duplicates
+    sku = serializers.CharField(max_length=64)
+    images = serializers.ListField(child=serializers.URLField(max_length=500), required=False)
+
+    class Meta:
+        model = Product
+        fields = COLUMNS
+
+
+def default_sku(pk):
+    """SKU given to products created without one, so every export re-imports"""
+    return f'P{pk}'
+
+
+def format_for(filename, default='csv'):
+    """Import/export format from a file name's extension"""
+    if filename and filename.lower().endswith(('.jsonl', '.json', '.ndjson')):
+        return 'jsonl'
+    if filename and filename.lower().endswith('.csv'):
+        return 'csv'
+    return default
+
+
+# Import
+
+def read_rows(stream, file_format):
+    """
+    Parse a text stream lazily into (row number, data, error) tuples, one
+    row at a time so memory doesn't grow with the file.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for data in reader:
+            row = {}
+            for column, value in data.items():
+                if column is None:
+                    continue
+                value = (value or '').strip()
+                if column == 'images':
+                    row['images'] = [url for url in value.split(IMAGE_SEPARATOR) if url]
+                elif column == 'original_price' and value == '':
+                    row[column] = None
+                else:
+                    row[column] = value
+            yield reader.line_num, row, None
+        return
+
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield number, None, {'non_field_errors': [f'Invalid JSON: {exc}']}
+            continue
+        if not isinstance(data, dict):
+            yield number, None, {'non_field_errors': ['Expected a JSON object']}
+            continue
+        yield number, data, None
+
+
+def sync_images(images_by_product):
+    """
+    Make each product's URL images match a list of URLs, in order. Images
+    that are kept only get their order updated, so one read and at most one
+    bulk delete, create and update run for all products together. Uploaded
+    image files are left alone.
+    """
+    existing = defaultdict(list)
+    for image in (
+        ProductImage.objects.filter(product_id__in=list(images_by_product))
+        .exclude(image_url__isnull=True).exclude(image_url='')
+        .order_by('order', 'id')
+    ):
+        existing[image.product_id].append(image)
+
+    to_create, to_update, to_delete = [], [], []
+    for product_id, urls in images_by_product.items():
+        current = {}
+        for image in existing[product_id]:
+            if image.image_url in current:
+                to_delete.append(image.pk)
+            else:
+                current[image.image_url] = image
+        for order, url in enumerate(urls):
+            image = current.pop(url, None)
+            if image is None:
+                to_create.append(ProductImage(product_id=product_id, image_url=url, order=order))
+            elif image.order != order:
+                image.order = order
+                to_update.append(image)
+        to_delete.extend(image.pk for image in current.values())
+
+    if to_delete:
+        ProductImage.objects.filter(pk__in=to_delete).delete()
+    ProductImage.objects.bulk_create(to_create, batch_size=1000)
+    ProductImage.objects.bulk_update(to_update, ['order'], batch_size=1000)
+    return len(to_create), len(to_update), len(to_delete)
+
+
+class ImportResult:
+    """Running totals for a bulk import"""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'failed': self.failed,
+            'errors': self.errors,
+        }
+
+
+def import_chunk(chunk, result):
+    """Validate one chunk of rows and write the valid ones in bulk"""
+    skus = [
+        str(data.get('sku', '')).strip() for _, data, error in chunk
+        if error is None and data.get('sku')
+    ]
+    existing = Product.objects.in_bulk(skus, field_name='sku')
+
+    # One serializer per mode validates every row, building its fields once
+    # instead of per row. Rows for existing products only need the columns
+    # they change.
+    validators = {partial: ProductImportSerializer(partial=partial) for partial in (False, True)}
+    valid = {}
+    for number, data, error in chunk:
+        if error is not None:
+            result.add_error(number, error)
+            continue
+        sku = str(data.get('sku', '')).strip()
+        try:
+            row = validators[sku in existing].run_validation(data)
+        except serializers.ValidationError as exc:
+            result.add_error(number, serializers.as_serializer_error(exc))
+            continue
+        # A SKU repeated in the file: the last row wins
+        valid[row['sku']] = (number, row)
+
+    now = timezone.now()
+    to_create, to_update, changed, images = [], [], set(), {}
+    for sku, (number, row) in valid.items():
+        row = dict(row)
+        urls = row.pop('images', None)
+        product = existing.get(sku)
+        if product is None:
+            product = Product(**row)
+            # No offer yet, so the pre_save pricing shortcut is exact
+            product.effective_price = product.price
+            to_create.append(product)
+        else:
+            # Unchanged rows are skipped, re-importing an export is cheap
+            fields = [field for field, value in row.items() if getattr(product, field) != value]
+            if fields:
+                for field in fields:
+                    setattr(product, field, row[field])
+                product.updated_at = now
+                changed.update(fields)
+                to_update.append(product)
+            else:
+                result.unchanged += 1
+        if urls is not None:
+            images[sku] = urls
+
+    try:
+        with transaction.atomic():
+            Product.objects.bulk_create(to_create, batch_size=500)
+            # Only the columns some row actually changed are written
+            Product.objects.bulk_update(to_update, sorted(changed) + ['updated_at'], batch_size=500)
+            if 'price' in changed:
+                refresh_effective_prices(
+                    Product.objects.filter(pk__in=[product.pk for product in to_update])
+                )
+            products = {product.sku: product.pk for product in to_create}
+            products.update((sku, product.pk) for sku, product in existing.items())
+            sync_images({products[sku]: urls for sku, urls in images.items()})
+    except DatabaseError as exc:
+        for number, _ in valid.values():
+            result.add_error(number, {'non_field_errors': [f'Database error: {exc}']})
+        return
+
+    result.created += len(to_create)
+    result.updated += len(to_update)
+
+
+def import_products(rows, chunk_size=500):
+    """
+    Upsert products keyed on SKU from (row number, data, error) tuples.
+    Rows are validated and written a chunk at a time, and a bad row is
+    reported without aborting the rest of the import.
+    """
+    result = ImportResult()
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            import_chunk(chunk, result)
+            chunk = []
+    if chunk:
+        import_chunk(chunk, result)
+    if result.created or result.updated:
+        transaction.on_commit(invalidate_catalog)
+    return result
+
+
+# Export
+
+def export_rows(queryset=None, chunk_size=2000):
+    """
+    Yield one dict per product with its image URLs. Products are read in
+    primary-key batches, so memory stays flat for any catalog size and no
+    cursor is held open between batches.
+    """
+    queryset = (queryset if queryset is not None else Product.objects.all()).order_by('pk')
+    images = Prefetch(
+        'images',
+        queryset=ProductImage.objects.exclude(image_url__isnull=True)
+        .exclude(image_url='').order_by('order', 'id'),
+        to_attr='export_images'
+    )
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk).prefetch_related(images)[:chunk_size])
+        if not batch:
+            return
+        for product in batch:
+            row = {field: getattr(product, field) for field in FIELDS}
+            row['images'] = [image.image_url for image in product.export_images]
+            yield row
+        last_pk = batch[-1].pk
+
+
+def render_rows(rows, file_format):
+    """Serialize export rows into chunks of text, one row at a time"""
+    if file_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(COLUMNS)
+        for row in rows:
+            writer.writerow(
+                ['' if row[field] is None else row[field] for field in FIELDS] +
+                [IMAGE_SEPARATOR.join(row['images'])]
+            )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+        return
+
+    for row in rows:
+        yield json.dumps(row, default=str) + '\n'
@@ -0,0 +1,96 @@
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Min, Q
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .models import Offer
+
+VERSION_KEY = 'catalog:version'
+
+
+def new_catalog_version():
+    # Seeded from the clock, so a version lost to eviction or a cache
+    # restart never reuses the key of an older generation
+    return time.time_ns() // 1000
+
+
+def get_catalog_version():
+    """Current catalog cache generation, bumped on every catalog change"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Another process may get there first, so read back what was stored
+        cache.add(VERSION_KEY, new_catalog_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_catalog():
+    """Invalidate every cached catalog response"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, new_catalog_version(), timeout=None)
+
+
+def build_cache_key(request, prefix):
+    """
+    Cache key for a catalog request. Query params are normalized (sorted,
+    empty values dropped, list values sorted) so equivalent URLs share an
+    entry. Host and scheme are included because payloads contain absolute URLs.
+    They are hashed, keeping keys short and free of spaces and control
+    characters whatever the query string holds.
+    """
+    params = []
+    for name in sorted(request.query_params.keys()):
+        values = sorted(v for v in request.query_params.getlist(name) if v != '')
+        if values:
+            params.append(f"{name}={','.join(values)}")
+    url = f"{request.scheme}://{request.get_host()}?{'&'.join(params)}"
+    return 'catalog:{version}:{prefix}:{digest}'.format(
+        version=get_catalog_version(),
+        prefix=prefix,
+        digest=hashlib.sha1(url.encode()).hexdigest()
+    )
+
+
+def get_cache_timeout():
+    """
+    Seconds a catalog entry may live: the configured timeout, cut short by
+    the next offer start or end so discounts appear and disappear on time.
+    """
+    timeout = getattr(settings, 'CATALOG_CACHE_TIMEOUT', 60)
+    now = timezone.now()
+    boundaries = Offer.objects.filter(active=True).aggregate(
+        next_start=Min('start_date', filter=Q(start_date__gt=now)),
+        next_end=Min('end_date', filter=Q(end_date__gte=now))
+    )
+    for boundary in boundaries.values():
+        if boundary is not None:
+            # Offers stay live through end_date, so expire just after it
+            seconds = math.ceil((boundary - now).total_seconds()) + 1
+            timeout = min(timeout, seconds)
+    return timeout
+
+
+def cached_response(request, prefix, build):
+    """
+    Serve an anonymous catalog read from the cache, calling `build` to
+    produce the response on a miss. Authenticated requests bypass the cache.
+    """
+    if request.user and request.user.is_authenticated:
+        return build()
+
+    key = build_cache_key(request, prefix)
+    data = cache.get(key)
+    if data is not None:
+        return Response(data)
+
+    response = build()
+    if response.status_code == 200:
+        cache.set(key, response.data, timeout=get_cache_timeout())
+    return response
@@ -0,0 +1,104 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+REPLICA = 'replica'
+# app_label of the database cache backend's table
+CACHE_APP_LABEL = 'django_cache'
+
+# Set for the duration of a request that may read from the replica
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def pin_key(request):
+    """Cache key identifying the client for read-after-write pinning"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'db-pin:user:{user.pk}'
+    return f'db-pin:ip:{request.META.get("REMOTE_ADDR")}'
+
+
+def pin_to_primary(request):
+    """
+    Send this client's reads to the primary for REPLICA_PIN_SECONDS. The pin
+    lives in the default cache, so it reaches every worker only when that
+    cache is shared (see CACHES in settings).
+    """
+    cache.set(pin_key(request), True, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(request):
+    return bool(cache.get(pin_key(request)))
+
+
+class ReplicaRouter:
+    """
+    Route reads to the replica only while a view has opted in (see
+    ReplicaReadMixin). A write anywhere in the request pins the rest of it
+    to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        # The database cache holds the catalog version and write pins, which
+        # must be read where they were just written
+        if _use_replica.get() and model._meta.app_label != CACHE_APP_LABEL:
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Filling the cache isn't a write the request's reads depend on
+        if model._meta.app_label != CACHE_APP_LABEL:
+            _use_replica.set(False)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaReadMixin:
+    """
+    Viewset mixin that serves `replica_actions` from the read replica,
+    unless the client wrote something in the last few seconds.
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            replica_configured() and
+            request.method in ('GET', 'HEAD', 'OPTIONS') and
+            self.action in self.replica_actions and
+            not is_pinned(request)
+        ):
+            self._replica_token = _use_replica.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _use_replica.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReadAfterWriteMiddleware:
+    """Pin clients to the primary right after a successful write request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            request.method not in ('GET', 'HEAD', 'OPTIONS') and
+            response.status_code < 400
+        ):
+            pin_to_primary(request)
+        return response
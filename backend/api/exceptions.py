@@ -0,0 +1,14 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class OutOfStock(APIException):
+    """Raised when an order asks for more units than a product has in stock"""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Insufficient stock'
+    default_code = 'out_of_stock'
+
+    def __init__(self, items=None):
+        super().__init__()
+        # Set the payload directly so counts stay numbers in the response
+        self.detail = {'error': str(self.default_detail), 'items': items or []}
@@ -0,0 +1,646 @@
+"""
+Minimal glTF 2.0 reader and writer for optimizing uploaded 3D models.
+Only the standard library is used, so models are processed in pure Python
+by the optimize_models worker rather than in a request.
+"""
+import base64
+import binascii
+import copy
+import hashlib
+import json
+import struct
+from collections import defaultdict
+from urllib.parse import unquote_to_bytes
+
+GLB_MAGIC = b'glTF'
+JSON_CHUNK = 0x4E4F534A
+BIN_CHUNK = 0x004E4942
+
+BYTE, UNSIGNED_BYTE, SHORT, UNSIGNED_SHORT, UNSIGNED_INT, FLOAT = (
+    5120, 5121, 5122, 5123, 5125, 5126
+)
+COMPONENT_FORMATS = {
+    BYTE: 'b', UNSIGNED_BYTE: 'B', SHORT: 'h',
+    UNSIGNED_SHORT: 'H', UNSIGNED_INT: 'I', FLOAT: 'f',
+}
+# Divisors that turn normalized integer components back into floats
+NORMALIZED_MAX = {BYTE: 127, UNSIGNED_BYTE: 255, SHORT: 32767, UNSIGNED_SHORT: 65535}
+TYPE_SIZES = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4, 'MAT2': 4, 'MAT3': 9, 'MAT4': 16}
+ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER = 34962, 34963
+TRIANGLES = 4
+
+# Extensions that never point at buffer views, so views can be repacked
+SUPPORTED_EXTENSIONS = (
+    'KHR_materials_', 'KHR_texture_transform', 'KHR_texture_basisu',
+    'KHR_lights_punctual', 'KHR_mesh_quantization', 'EXT_texture_webp',
+)
+# Cells along a mesh's longest side when clustering vertices for previews
+PREVIEW_GRID = 40
+
+
+class ModelError(ValueError):
+    """The file isn't a glTF 2.0 model the optimizer can process"""
+
+
+class Model:
+    """A parsed glTF document and the bytes of each of its buffers"""
+
+    def __init__(self, doc, buffers):
+        self.doc = doc
+        self.buffers = buffers
+
+
+# Reading
+
+def load(data):
+    """Parse and validate a GLB or self-contained .gltf file"""
+    binary = None
+    if data[:4] == GLB_MAGIC:
+        doc, binary = parse_glb(data)
+    else:
+        try:
+            doc = json.loads(data)
+        except (ValueError, UnicodeDecodeError):
+            raise ModelError('Not a GLB or glTF file')
+    if not isinstance(doc, dict):
+        raise ModelError('Not a GLB or glTF file')
+
+    buffers = []
+    for i, buffer in enumerate(doc.get('buffers', [])):
+        uri = buffer.get('uri')
+        if uri is None:
+            if i != 0 or binary is None:
+                raise ModelError(f'Buffer {i} has no data')
+            content = binary
+        elif uri.startswith('data:'):
+            content = decode_data_uri(uri)[0]
+        else:
+            raise ModelError(f'Buffer {i} refers to external file {uri!r}, upload a .glb instead')
+        if len(content) < buffer.get('byteLength', 0):
+            raise ModelError(f'Buffer {i} is shorter than its byteLength')
+        buffers.append(content)
+
+    model = Model(doc, buffers)
+    validate(model)
+    return model
+
+
+def parse_glb(data):
+    if len(data) < 20:
+        raise ModelError('Truncated GLB header')
+    _, version, length = struct.unpack_from('<4sII', data)
+    if version != 2:
+        raise ModelError(f'GLB version {version} is not supported')
+    if length > len(data):
+        raise ModelError('Truncated GLB file')
+
+    doc = binary = None
+    offset = 12
+    while offset + 8 <= length:
+        chunk_length, chunk_type = struct.unpack_from('<II', data, offset)
+        offset += 8
+        if offset + chunk_length > length:
+            raise ModelError('Truncated GLB chunk')
+        chunk = data[offset:offset + chunk_length]
+        offset += chunk_length
+        if chunk_type == JSON_CHUNK and doc is None:
+            try:
+                doc = json.loads(chunk)
+            except (ValueError, UnicodeDecodeError):
+                raise ModelError('Invalid GLB JSON chunk')
+        elif chunk_type == BIN_CHUNK and binary is None:
+            binary = chunk
+    if doc is None:
+        raise ModelError('GLB file has no JSON chunk')
+    return doc, binary
+
+
+def decode_data_uri(uri):
+    """(bytes, mime type) of a data: URI"""
+    header, _, payload = uri.partition(',')
+    mime_type = header[5:].split(';')[0]
+    if header.endswith(';base64'):
+        try:
+            return base64.b64decode(payload, validate=True), mime_type
+        except binascii.Error:
+            raise ModelError('Invalid base64 data URI')
+    return unquote_to_bytes(payload), mime_type
+
+
+def item(items, index, what):
+    if not isinstance(index, int) or not 0 <= index < len(items):
+        raise ModelError(f'{what} refers to a missing item')
+    return items[index]
+
+
+def element_size(accessor):
+    component = struct.calcsize(COMPONENT_FORMATS[accessor['componentType']])
+    size = TYPE_SIZES[accessor['type']]
+    if accessor['type'].startswith('MAT') and component < 4:
+        # Matrix columns of 1 and 2 byte components are padded to 4 bytes
+        columns = {4: 2, 9: 3, 16: 4}[size]
+        return columns * (-(-columns * component // 4) * 4)
+    return size * component
+
+
+def validate(model):
+    """Check the structure the optimizer relies on, raising ModelError"""
+    doc = model.doc
+    if not str(doc.get('asset', {}).get('version', '')).startswith('2.'):
+        raise ModelError('Only glTF 2.0 models are supported')
+    for name in set(doc.get('extensionsUsed', [])) | set(doc.get('extensionsRequired', [])):
+        if not name.startswith(SUPPORTED_EXTENSIONS):
+            raise ModelError(f'Extension {name} is not supported')
+
+    views = doc.get('bufferViews', [])
+    for i, view in enumerate(views):
+        buffer = item(model.buffers, view.get('buffer'), f'bufferView {i}')
+        if not isinstance(view.get('byteLength'), int):
+            raise ModelError(f'bufferView {i} has no byteLength')
+        if view.get('byteOffset', 0) + view['byteLength'] > len(buffer):
+            raise ModelError(f'bufferView {i} runs past the end of its buffer')
+        stride = view.get('byteStride')
+        if stride is not None and not 4 <= stride <= 252:
+            raise ModelError(f'bufferView {i} has an invalid byteStride')
+
+    accessors = doc.get('accessors', [])
+    for i, accessor in enumerate(accessors):
+        if accessor.get('componentType') not in COMPONENT_FORMATS:
+            raise ModelError(f'Accessor {i} has an invalid componentType')
+        if accessor.get('type') not in TYPE_SIZES:
+            raise ModelError(f'Accessor {i} has an invalid type')
+        count = accessor.get('count')
+        if not isinstance(count, int) or count < 1:
+            raise ModelError(f'Accessor {i} has an invalid count')
+        if 'sparse' in accessor:
+            raise ModelError(f'Accessor {i} is sparse, which is not supported')
+        if 'bufferView' in accessor:
+            view = item(views, accessor['bufferView'], f'Accessor {i}')
+            size = element_size(accessor)
+            stride = view.get('byteStride') or size
+            if accessor.get('byteOffset', 0) + stride * (count - 1) + size > view['byteLength']:
+                raise ModelError(f'Accessor {i} runs past the end of its bufferView')
+
+    materials = doc.get('materials', [])
+    for i, mesh in enumerate(doc.get('meshes', [])):
+        if not mesh.get('primitives'):
+            raise ModelError(f'Mesh {i} has no primitives')
+        for primitive in mesh['primitives']:
+            for index in primitive.get('attributes', {}).values():
+                item(accessors, index, f'Mesh {i}')
+            if 'indices' in primitive:
+                item(accessors, primitive['indices'], f'Mesh {i}')
+            if 'material' in primitive:
+                item(materials, primitive['material'], f'Mesh {i}')
+            for target in primitive.get('targets', []):
+                for index in target.values():
+                    item(accessors, index, f'Mesh {i}')
+
+    for i, skin in enumerate(doc.get('skins', [])):
+        if 'inverseBindMatrices' in skin:
+            item(accessors, skin['inverseBindMatrices'], f'Skin {i}')
+    for i, animation in enumerate(doc.get('animations', [])):
+        for sampler in animation.get('samplers', []):
+            item(accessors, sampler.get('input'), f'Animation {i}')
+            item(accessors, sampler.get('output'), f'Animation {i}')
+
+    nodes = doc.get('nodes', [])
+    for i, node in enumerate(nodes):
+        if 'mesh' in node:
+            item(doc.get('meshes', []), node['mesh'], f'Node {i}')
+        if 'skin' in node:
+            item(doc.get('skins', []), node['skin'], f'Node {i}')
+        for child in node.get('children', []):
+            item(nodes, child, f'Node {i}')
+    for i, scene in enumerate(doc.get('scenes', [])):
+        for index in scene.get('nodes', []):
+            item(nodes, index, f'Scene {i}')
+
+    for i, image in enumerate(doc.get('images', [])):
+        if 'bufferView' in image:
+            item(views, image['bufferView'], f'Image {i}')
+        elif not str(image.get('uri', '')).startswith('data:'):
+            raise ModelError(f'Image {i} refers to an external file, upload a .glb instead')
+
+
+def view_bytes(model, index):
+    view = model.doc['bufferViews'][index]
+    offset = view.get('byteOffset', 0)
+    return model.buffers[view['buffer']][offset:offset + view['byteLength']]
+
+
+def read_accessor(model, index):
+    """An accessor's components as one flat tuple, as stored"""
+    accessor = model.doc['accessors'][index]
+    components = TYPE_SIZES[accessor['type']]
+    fmt = COMPONENT_FORMATS[accessor['componentType']]
+    count = accessor['count']
+    if 'bufferView' not in accessor:
+        return (0,) * (count * components)
+
+    view = model.doc['bufferViews'][accessor['bufferView']]
+    buffer = model.buffers[view['buffer']]
+    start = view.get('byteOffset', 0) + accessor.get('byteOffset', 0)
+    element = struct.Struct(f'<{components}{fmt}')
+    stride = view.get('byteStride') or element.size
+    if stride == element.size:
+        return struct.unpack_from(f'<{count * components}{fmt}', buffer, start)
+    values = []
+    for i in range(count):
+        values.extend(element.unpack_from(buffer, start + i * stride))
+    return tuple(values)
+
+
+def read_floats(model, index):
+    """An accessor's components as floats, undoing integer normalization"""
+    accessor = model.doc['accessors'][index]
+    values = read_accessor(model, index)
+    if accessor.get('normalized'):
+        divisor = NORMALIZED_MAX[accessor['componentType']]
+        return [max(value / divisor, -1.0) for value in values]
+    return values
+
+
+# Writing
+
+def pack(values, components, fmt, stride_components=None):
+    """Pack flat components into elements padded to `stride_components`"""
+    stride_components = stride_components or components
+    if stride_components != components:
+        padded = [0] * (len(values) // components * stride_components)
+        for k in range(components):
+            padded[k::stride_components] = values[k::components]
+        values = padded
+    return struct.pack(f'<{len(values)}{fmt}', *values)
+
+
+class BinaryBuilder:
+    """Packs buffer views into one binary chunk, storing identical views once"""
+
+    def __init__(self):
+        self.views = []
+        self.chunks = []
+        self.length = 0
+        self.seen = {}
+
+    def add(self, data, stride=None, target=None):
+        """Append a view's bytes and return its index"""
+        key = (hashlib.sha256(data).digest(), stride, target)
+        if key in self.seen:
+            return self.seen[key]
+        padding = -self.length % 4
+        if padding:
+            self.chunks.append(b'\0' * padding)
+            self.length += padding
+        view = {'buffer': 0, 'byteOffset': self.length, 'byteLength': len(data)}
+        if stride:
+            view['byteStride'] = stride
+        if target:
+            view['target'] = target
+        self.chunks.append(data)
+        self.length += len(data)
+        self.views.append(view)
+        self.seen[key] = len(self.views) - 1
+        return self.seen[key]
+
+    def binary(self):
+        return b''.join(self.chunks) + b'\0' * (-self.length % 4)
+
+
+def to_glb(doc, builder):
+    """Serialize a document and its packed views as a GLB file"""
+    binary = builder.binary()
+    doc['bufferViews'] = builder.views
+    if binary:
+        doc['buffers'] = [{'byteLength': len(binary)}]
+    else:
+        doc.pop('buffers', None)
+    for key in ('bufferViews', 'images', 'textures', 'samplers', 'materials'):
+        if key in doc and not doc[key]:
+            del doc[key]
+
+    content = json.dumps(doc, separators=(',', ':')).encode()
+    content += b' ' * (-len(content) % 4)
+    chunks = struct.pack('<II', len(content), JSON_CHUNK) + content
+    if binary:
+        chunks += struct.pack('<II', len(binary), BIN_CHUNK) + binary
+    return struct.pack('<4sII', GLB_MAGIC, 2, 12 + len(chunks)) + chunks
+
+
+# Optimizing
+
+def accessor_roles(doc):
+    """What each accessor is used for: vertex attributes, indices or other"""
+    roles = defaultdict(set)
+    for m, mesh in enumerate(doc.get('meshes', [])):
+        for primitive in mesh['primitives']:
+            for semantic, index in primitive.get('attributes', {}).items():
+                roles[index].add(('attribute', m, semantic))
+            if 'indices' in primitive:
+                roles[primitive['indices']].add(('indices',))
+            for target in primitive.get('targets', []):
+                for index in target.values():
+                    roles[index].add(('other',))
+    for skin in doc.get('skins', []):
+        if 'inverseBindMatrices' in skin:
+            roles[skin['inverseBindMatrices']].add(('other',))
+    for animation in doc.get('animations', []):
+        for sampler in animation.get('samplers', []):
+            roles[sampler.get('input')].add(('other',))
+            roles[sampler.get('output')].add(('other',))
+    return roles
+
+
+def quantize_attribute(model, index, semantic):
+    """
+    (data, stride, accessor changes) for a float NORMAL, TANGENT or
+    TEXCOORD accessor stored as normalized integers, or None to keep it.
+    """
+    accessor = model.doc['accessors'][index]
+    if accessor['componentType'] != FLOAT:
+        return None
+    values = read_accessor(model, index)
+    if semantic == 'NORMAL' and accessor['type'] == 'VEC3':
+        quantized = [round(max(-1.0, min(1.0, value)) * 127) for value in values]
+        return pack(quantized, 3, 'b', 4), 4, {'componentType': BYTE}
+    if semantic == 'TANGENT' and accessor['type'] == 'VEC4':
+        quantized = [round(max(-1.0, min(1.0, value)) * 127) for value in values]
+        return pack(quantized, 4, 'b'), 4, {'componentType': BYTE}
+    if semantic.startswith('TEXCOORD_') and accessor['type'] == 'VEC2':
+        # Coordinates outside 0..1 would need KHR_texture_transform
+        if values and (min(values) < 0.0 or max(values) > 1.0):
+            return None
+        quantized = [round(value * 65535) for value in values]
+        return pack(quantized, 2, 'H'), 4, {'componentType': UNSIGNED_SHORT}
+    return None
+
+
+def quantize_positions(model, indexes):
+    """
+    Store one mesh's float positions as 16-bit integers. Returns
+    ({accessor: (data, changes)}, translation, scale) where the
+    translation and uniform scale map the integers back to model space.
+    """
+    values = {index: read_accessor(model, index) for index in indexes}
+    low = [min(min(v[k::3]) for v in values.values()) for k in range(3)]
+    high = [max(max(v[k::3]) for v in values.values()) for k in range(3)]
+    center = [(low[k] + high[k]) / 2 for k in range(3)]
+    # A uniform scale keeps normals valid without renormalizing them
+    scale = max(high[k] - low[k] for k in range(3)) / 65534 or 1.0
+
+    quantized = {}
+    for index, positions in values.items():
+        result = [0] * len(positions)
+        for k in range(3):
+            result[k::3] = [round((value - center[k]) / scale) for value in positions[k::3]]
+        changes = {
+            'componentType': SHORT,
+            'min': [min(result[k::3]) for k in range(3)],
+            'max': [max(result[k::3]) for k in range(3)],
+        }
+        quantized[index] = (pack(result, 3, 'h', 4), changes)
+    return quantized, center, scale
+
+
+def optimize(model):
+    """
+    Rewrite a model as a compact GLB: buffers and images are packed into
+    one binary chunk with identical views stored once, 32-bit indices
+    shrink to 16 bits where they fit, and float vertex attributes are
+    quantized under KHR_mesh_quantization. Skinned and morphed meshes keep
+    float positions.
+    """
+    doc = copy.deepcopy(model.doc)
+    accessors = doc.get('accessors', [])
+    meshes = doc.get('meshes', [])
+    nodes = doc.get('nodes', [])
+    roles = accessor_roles(doc)
+    skinned = {node['mesh'] for node in nodes if 'mesh' in node and 'skin' in node}
+
+    # accessor index -> (data, stride, target, accessor changes)
+    replaced = {}
+    for index, uses in roles.items():
+        kinds = {use[0] for use in uses}
+        if kinds == {'indices'}:
+            accessor = accessors[index]
+            if accessor['componentType'] == UNSIGNED_INT:
+                values = read_accessor(model, index)
+                if max(values) < 65535:
+                    replaced[index] = (
+                        pack(values, 1, 'H'), None, ELEMENT_ARRAY_BUFFER,
+                        {'componentType': UNSIGNED_SHORT}
+                    )
+        elif kinds == {'attribute'} and len({use[2] for use in uses}) == 1:
+            semantic = next(iter(uses))[2]
+            if semantic != 'POSITION':
+                result = quantize_attribute(model, index, semantic)
+                if result:
+                    data, stride, changes = result
+                    replaced[index] = (data, stride, ARRAY_BUFFER, {**changes, 'normalized': True})
+
+    transforms = {}
+    for m, mesh in enumerate(meshes):
+        positions = {
+            primitive['attributes']['POSITION'] for primitive in mesh['primitives']
+            if 'POSITION' in primitive.get('attributes', {})
+        }
+        if (
+            not positions or m in skinned
+            or any(primitive.get('targets') for primitive in mesh['primitives'])
+            # Positions shared with another mesh would need its transform too
+            or any(roles[index] != {('attribute', m, 'POSITION')} for index in positions)
+            or any(accessors[index]['componentType'] != FLOAT for index in positions)
+        ):
+            continue
+        quantized, center, scale = quantize_positions(model, positions)
+        for index, (data, changes) in quantized.items():
+            replaced[index] = (data, 8, ARRAY_BUFFER, changes)
+        transforms[m] = (center, scale)
+
+    # Positions are dequantized by a child node carrying the transform
+    for node in list(nodes):
+        if node.get('mesh') in transforms:
+            m = node.pop('mesh')
+            center, scale = transforms[m]
+            node.setdefault('children', []).append(len(nodes))
+            nodes.append({'mesh': m, 'translation': center, 'scale': [scale] * 3})
+
+    builder = BinaryBuilder()
+    view_map = {}
+
+    def copy_view(index):
+        if index not in view_map:
+            view = model.doc['bufferViews'][index]
+            view_map[index] = builder.add(
+                view_bytes(model, index), view.get('byteStride'), view.get('target')
+            )
+        return view_map[index]
+
+    for index, accessor in enumerate(accessors):
+        if index in replaced:
+            data, stride, target, changes = replaced[index]
+            if 'normalized' not in changes:
+                accessor.pop('normalized', None)
+            if 'min' not in changes:
+                accessor.pop('min', None)
+                accessor.pop('max', None)
+            accessor.update(changes)
+            accessor['bufferView'] = builder.add(data, stride, target)
+            accessor.pop('byteOffset', None)
+        elif 'bufferView' in accessor:
+            accessor['bufferView'] = copy_view(accessor['bufferView'])
+
+    for image in doc.get('images', []):
+        if 'bufferView' in image:
+            image['bufferView'] = copy_view(image['bufferView'])
+        else:
+            data, mime_type = decode_data_uri(image.pop('uri'))
+            image['bufferView'] = builder.add(data)
+            image['mimeType'] = image.get('mimeType') or mime_type
+
+    if any(target == ARRAY_BUFFER for _, _, target, _ in replaced.values()):
+        for key in ('extensionsUsed', 'extensionsRequired'):
+            if 'KHR_mesh_quantization' not in doc.setdefault(key, []):
+                doc[key].append('KHR_mesh_quantization')
+    return to_glb(doc, builder)
+
+
+# Previews
+
+def cluster(positions, indices, cell, origin):
+    """
+    Simplify a triangle list by vertex clustering: vertices in the same
+    grid cell merge into their average, and triangles that collapse are
+    dropped. Returns (flat positions, indices) with unused vertices removed.
+    """
+    ox, oy, oz = origin
+    cells = {}
+    sums = []
+    remap = []
+    for i in range(0, len(positions), 3):
+        x, y, z = positions[i], positions[i + 1], positions[i + 2]
+        key = (int((x - ox) / cell), int((y - oy) / cell), int((z - oz) / cell))
+        j = cells.get(key)
+        if j is None:
+            j = cells[key] = len(sums)
+            sums.append([x, y, z, 1])
+        else:
+            total = sums[j]
+            total[0] += x
+            total[1] += y
+            total[2] += z
+            total[3] += 1
+        remap.append(j)
+
+    used = {}
+    triangles = []
+    seen = set()
+    for t in range(0, len(indices) - 2, 3):
+        a, b, c = remap[indices[t]], remap[indices[t + 1]], remap[indices[t + 2]]
+        if a == b or b == c or a == c:
+            continue
+        # The same triangle with the same winding, whichever corner starts it
+        key = min((a, b, c), (b, c, a), (c, a, b))
+        if key in seen:
+            continue
+        seen.add(key)
+        triangles.extend(used.setdefault(v, len(used)) for v in (a, b, c))
+
+    vertices = [0.0] * (len(used) * 3)
+    for j, new in used.items():
+        x, y, z, n = sums[j]
+        vertices[new * 3:new * 3 + 3] = (x / n, y / n, z / n)
+    return vertices, triangles
+
+
+def plain_material(material):
+    """A material's colour factors without its textures"""
+    pbr = material.get('pbrMetallicRoughness', {})
+    result = {
+        key: material[key] for key in
+        ('name', 'emissiveFactor', 'alphaMode', 'alphaCutoff', 'doubleSided') if key in material
+    }
+    result['pbrMetallicRoughness'] = {
+        key: pbr[key] for key in
+        ('baseColorFactor', 'metallicFactor', 'roughnessFactor') if key in pbr
+    }
+    return result
+
+
+def build_preview(model, grid=PREVIEW_GRID):
+    """
+    A low-poly GLB of the model for quick first renders: triangle meshes
+    are clustered on a `grid`-cell lattice, and only positions and plain
+    material colours are kept. Viewers compute flat normals themselves.
+    """
+    source = model.doc
+    builder = BinaryBuilder()
+    accessors, meshes, mesh_map = [], [], {}
+    for m, mesh in enumerate(source.get('meshes', [])):
+        primitives = []
+        for primitive in mesh['primitives']:
+            attributes = primitive.get('attributes', {})
+            if primitive.get('mode', TRIANGLES) != TRIANGLES or 'POSITION' not in attributes:
+                continue
+            positions = read_floats(model, attributes['POSITION'])
+            if 'indices' in primitive:
+                indices = read_accessor(model, primitive['indices'])
+            else:
+                indices = range(len(positions) // 3)
+            low = [min(positions[k::3]) for k in range(3)]
+            high = [max(positions[k::3]) for k in range(3)]
+            cell = max(high[k] - low[k] for k in range(3)) / grid or 1.0
+            vertices, triangles = cluster(positions, indices, cell, low)
+            if not triangles:
+                continue
+
+            count = len(vertices) // 3
+            wide = count >= 65535
+            result = {
+                'attributes': {'POSITION': len(accessors)},
+                'indices': len(accessors) + 1,
+            }
+            accessors.append({
+                'bufferView': builder.add(pack(vertices, 3, 'f'), None, ARRAY_BUFFER),
+                'componentType': FLOAT, 'count': count, 'type': 'VEC3',
+                'min': [min(vertices[k::3]) for k in range(3)],
+                'max': [max(vertices[k::3]) for k in range(3)],
+            })
+            accessors.append({
+                'bufferView': builder.add(
+                    pack(triangles, 1, 'I' if wide else 'H'), None, ELEMENT_ARRAY_BUFFER
+                ),
+                'componentType': UNSIGNED_INT if wide else UNSIGNED_SHORT,
+                'count': len(triangles), 'type': 'SCALAR',
+            })
+            if 'material' in primitive:
+                result['material'] = primitive['material']
+            primitives.append(result)
+        if primitives:
+            mesh_map[m] = len(meshes)
+            meshes.append({'primitives': primitives})
+
+    nodes = []
+    for node in source.get('nodes', []):
+        result = {
+            key: node[key] for key in
+            ('name', 'children', 'translation', 'rotation', 'scale', 'matrix') if key in node
+        }
+        if node.get('mesh') in mesh_map:
+            result['mesh'] = mesh_map[node['mesh']]
+        nodes.append(result)
+
+    doc = {
+        'asset': {'version': '2.0', 'generator': 'jewelry-store preview'},
+        'scenes': copy.deepcopy(source.get('scenes', [])),
+        'nodes': nodes,
+        'meshes': meshes,
+        'accessors': accessors,
+        'materials': [plain_material(material) for material in source.get('materials', [])],
+    }
+    if 'scene' in source:
+        doc['scene'] = source['scene']
+    for key in ('scenes', 'nodes', 'meshes', 'accessors'):
+        if not doc[key]:
+            del doc[key]
+    return to_glb(doc, builder)
@@ -0,0 +1,101 @@
+import hashlib
+import io
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# Longest edge in pixels for each derivative, smallest first
+SIZES = {'thumb': 160, 'card': 480, 'detail': 1200}
+# Pillow format and save options for each derivative format
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+DERIVED_DIR = 'products/derived'
+
+
+def has_derivatives(image):
+    """Whether derivatives exist for the image's current file"""
+    return bool(image.image) and image.derivatives.get('source') == image.image.name
+
+
+def needs_derivatives(image):
+    """Whether an uploaded image has no derivatives for its current file"""
+    return bool(image.image) and not has_derivatives(image)
+
+
+def encode(picture, file_format):
+    pil_format, options = FORMATS[file_format]
+    if pil_format == 'JPEG' and picture.mode == 'RGBA':
+        # JPEG has no alpha, so flatten transparent areas onto white
+        background = Image.new('RGB', picture.size, 'white')
+        background.paste(picture, mask=picture.getchannel('A'))
+        picture = background
+    buffer = io.BytesIO()
+    picture.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def store(content, size, file_format):
+    """
+    Save derivative bytes under a name derived from their hash. Identical
+    output is stored once, and a name never changes content, so the files
+    can be served with far-future cache headers.
+    """
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    name = f'{DERIVED_DIR}/{digest}-{size}.{file_format}'
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(content))
+    return name
+
+
+def build_derivatives(image):
+    """
+    Render every size and format of an uploaded image and save the names on
+    the row. The original file is left as uploaded. Returns the new
+    derivatives dict.
+    """
+    with image.image.open('rb') as source:
+        picture = Image.open(source)
+        picture.load()
+        picture = ImageOps.exif_transpose(picture)
+        if picture.mode not in ('RGB', 'RGBA'):
+            has_alpha = picture.mode in ('LA', 'PA') or 'transparency' in picture.info
+            picture = picture.convert('RGBA' if has_alpha else 'RGB')
+
+    derivatives = {'source': image.image.name}
+    # Each size is scaled down from the next larger one, which is much
+    # cheaper than resampling the full-size original every time
+    for size, edge in sorted(SIZES.items(), key=lambda item: -item[1]):
+        picture = picture.copy()
+        picture.thumbnail((edge, edge), Image.LANCZOS)
+        derivatives[size] = {
+            'width': picture.width,
+            'height': picture.height,
+            **{file_format: store(encode(picture, file_format), size, file_format)
+               for file_format in FORMATS},
+        }
+
+    type(image).objects.filter(pk=image.pk).update(derivatives=derivatives)
+    image.derivatives = derivatives
+    return derivatives
+
+
+def derivative_url(image, size, file_format='jpeg'):
+    """Storage URL of one derivative, or None if it hasn't been built"""
+    if not has_derivatives(image):
+        return None
+    return default_storage.url(image.derivatives[size][file_format])
+
+
+def srcset(image, file_format, build_url=None):
+    """`srcset` attribute value listing every derivative width"""
+    if not has_derivatives(image):
+        return None
+    build_url = build_url or (lambda url: url)
+    return ', '.join(
+        f"{build_url(default_storage.url(image.derivatives[size][file_format]))} "
+        f"{image.derivatives[size]['width']}w"
+        for size in SIZES
+    )
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+from api.models import DailySales, DailyProductSales, Order, OrderItem
+from api.rollups import LINE_REVENUE
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily sales rollups from delivered order history'
+
+    def handle(self, *args, **kwargs):
+        delivered = Order.Status.DELIVERED
+        days = (
+            Order.objects.filter(status=delivered)
+            .annotate(date=TruncDate('created_at'))
+            .order_by()
+            .values('date')
+            .annotate(revenue=Sum('total'), order_count=Count('id'))
+        )
+        product_days = (
+            OrderItem.objects.filter(order__status=delivered)
+            .annotate(date=TruncDate('order__created_at'))
+            .order_by()
+            .values('date', 'product')
+            .annotate(units=Sum('quantity'), line_revenue=Sum(LINE_REVENUE))
+        )
+
+        with transaction.atomic():
+            DailySales.objects.all().delete()
+            DailyProductSales.objects.all().delete()
+            DailySales.objects.bulk_create(
+                [DailySales(**row) for row in days.iterator()],
+                batch_size=1000
+            )
+            DailyProductSales.objects.bulk_create(
+                [
+                    DailyProductSales(
+                        date=row['date'],
+                        product_id=row['product'],
+                        quantity=row['units'],
+                        revenue=row['line_revenue']
+                    )
+                    for row in product_days.iterator()
+                ],
+                batch_size=1000
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt sales rollups: {DailySales.objects.count()} days, '
+            f'{DailyProductSales.objects.count()} product-days'
+        ))
@@ -0,0 +1,86 @@
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.core.management.base import BaseCommand
+
+from api.models import Product
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = 'Load test the catalog read endpoints of a running server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/api/v1')
+        parser.add_argument('--duration', type=float, default=15, help='Seconds to run')
+        parser.add_argument('--clients', type=int, default=16, help='Concurrent clients')
+        parser.add_argument('--pages', type=int, default=20, help='List pages to spread requests over')
+        parser.add_argument(
+            '--token',
+            help='Bearer token to send, which bypasses the anonymous catalog cache'
+        )
+
+    def handle(self, *args, **options):
+        base = options['url'].rstrip('/')
+        # The server must use the same database for these ids to exist
+        product_ids = list(Product.objects.order_by('?').values_list('id', flat=True)[:200])
+        paths = (
+            [f'/products/?page={page}' for page in range(1, options['pages'] + 1)] +
+            [f'/products/?page={page}&sort_by=price_asc' for page in range(1, options['pages'] + 1)] +
+            [f'/products/{product_id}/' for product_id in product_ids] +
+            ['/offers/active/']
+        )
+        headers = {}
+        if options['token']:
+            headers['Authorization'] = f"Bearer {options['token']}"
+
+        latencies = []
+        errors = 0
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['duration']
+
+        def client():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                request = urllib.request.Request(base + random.choice(paths), headers=headers)
+                started = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(request, timeout=30) as response:
+                        response.read()
+                    ok = True
+                except (urllib.error.URLError, OSError):
+                    ok = False
+                elapsed = time.perf_counter() - started
+                with lock:
+                    if ok:
+                        latencies.append(elapsed)
+                    else:
+                        errors += 1
+
+        threads = [threading.Thread(target=client) for _ in range(options['clients'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{'requests':>10}{'errors':>8}{'req/s':>8}"
+            f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        )
+        self.stdout.write(
+            f"{len(latencies):>10}{errors:>8}{len(latencies) / elapsed:>8.1f}"
+            f"{percentile(latencies, 0.5) * 1000:>10.1f}"
+            f"{percentile(latencies, 0.95) * 1000:>10.1f}"
+            f"{percentile(latencies, 0.99) * 1000:>10.1f}"
+        )
@@ -0,0 +1,89 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.core.management.base import BaseCommand
+
+from api.models import User
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = 'Measure login latency against a running server while catalog traffic runs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/api/v1')
+        parser.add_argument('--duration', type=float, default=15, help='Seconds to run')
+        parser.add_argument('--logins', type=int, default=8, help='Concurrent login clients')
+        parser.add_argument('--readers', type=int, default=8, help='Concurrent catalog clients')
+        parser.add_argument('--username', default='benchmark-login')
+        parser.add_argument('--password', default='benchmark-password-1')
+
+    def handle(self, *args, **options):
+        # The server must use the same database for this user to log in
+        user, _ = User.objects.get_or_create(username=options['username'])
+        user.set_password(options['password'])
+        user.save()
+
+        base = options['url'].rstrip('/')
+        body = json.dumps({
+            'username': options['username'], 'password': options['password']
+        }).encode()
+        latencies = {'login': [], 'catalog': []}
+        errors = {'login': 0, 'catalog': 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['duration']
+
+        def client(kind):
+            while time.monotonic() < deadline:
+                if kind == 'login':
+                    request = urllib.request.Request(
+                        f'{base}/auth/login/', data=body,
+                        headers={'Content-Type': 'application/json'}
+                    )
+                else:
+                    request = urllib.request.Request(f'{base}/products/?page_size=20')
+                started = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(request, timeout=30) as response:
+                        response.read()
+                    ok = True
+                except (urllib.error.URLError, OSError):
+                    ok = False
+                elapsed = time.perf_counter() - started
+                with lock:
+                    if ok:
+                        latencies[kind].append(elapsed)
+                    else:
+                        errors[kind] += 1
+
+        threads = [
+            threading.Thread(target=client, args=('login',)) for _ in range(options['logins'])
+        ] + [
+            threading.Thread(target=client, args=('catalog',)) for _ in range(options['readers'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.stdout.write(
+            f"{'endpoint':<10}{'requests':>10}{'errors':>8}{'req/s':>8}"
+            f"{'p50 ms':>10}{'p99 ms':>10}"
+        )
+        for kind in ('login', 'catalog'):
+            samples = latencies[kind]
+            self.stdout.write(
+                f"{kind:<10}{len(samples):>10}{errors[kind]:>8}"
+                f"{len(samples) / options['duration']:>8.1f}"
+                f"{percentile(samples, 0.5) * 1000:>10.1f}"
+                f"{percentile(samples, 0.99) * 1000:>10.1f}"
+            )
@@ -0,0 +1,63 @@
+import time
+import urllib.error
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Measure time to first byte and bytes transferred for 3D model fetches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Model file URL on a running server')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per scenario')
+        parser.add_argument(
+            '--range-kb', type=int, default=64,
+            help='Size of the partial fetches, e.g. a GLB header and JSON chunk'
+        )
+
+    def fetch(self, url, headers):
+        request = urllib.request.Request(url, headers=headers)
+        started = time.perf_counter()
+        try:
+            response = urllib.request.urlopen(request, timeout=60)
+        except urllib.error.HTTPError as exc:
+            # 304 and 416 arrive as errors, they still count as responses
+            response = exc
+        with response:
+            first = response.read(1)
+            first_byte = time.perf_counter() - started
+            body = first + response.read()
+        return response.status, first_byte, time.perf_counter() - started, len(body)
+
+    def handle(self, *args, **options):
+        url = options['url']
+        try:
+            status, _, _, size = self.fetch(url, {})
+        except (urllib.error.URLError, OSError) as exc:
+            raise CommandError(f'Cannot fetch {url}: {exc}')
+        probe = urllib.request.urlopen(urllib.request.Request(url, method='HEAD'), timeout=60)
+        etag = probe.headers.get('ETag', '')
+        part = options['range_kb'] * 1024
+
+        scenarios = [
+            ('full', {}),
+            ('full gzip', {'Accept-Encoding': 'gzip'}),
+            ('full br', {'Accept-Encoding': 'br, gzip'}),
+            ('first range', {'Range': f'bytes=0-{part - 1}'}),
+            ('middle range', {'Range': f'bytes={size // 2}-{size // 2 + part - 1}'}),
+            ('last range', {'Range': f'bytes=-{part}'}),
+            ('revalidate', {'If-None-Match': etag}),
+        ]
+        self.stdout.write(
+            f"{'scenario':<14}{'status':>8}{'bytes':>12}{'ttfb ms':>10}{'total ms':>10}"
+        )
+        for label, headers in scenarios:
+            runs = [self.fetch(url, headers) for _ in range(options['repeat'])]
+            status, _, _, received = runs[-1]
+            first_byte = sorted(run[1] for run in runs)[len(runs) // 2]
+            total = sorted(run[2] for run in runs)[len(runs) // 2]
+            self.stdout.write(
+                f'{label:<14}{status:>8}{received:>12}'
+                f'{first_byte * 1000:>10.1f}{total * 1000:>10.1f}'
+            )
@@ -0,0 +1,108 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from api.models import Product
+from api.search import SEARCH_FIELDS, search_products
+
+WORDS = [
+    'classic', 'vintage', 'elegant', 'twisted', 'hammered', 'engraved',
+    'floral', 'minimal', 'royal', 'celestial', 'heart', 'infinity',
+    'pearl', 'diamond', 'sapphire', 'emerald', 'ruby', 'filigree',
+    'braided', 'solitaire', 'halo', 'charm', 'pendant', 'hoop', 'stud',
+    'cuff', 'bangle', 'locket', 'signet', 'chain', 'spoon', 'platter',
+]
+SYLLABLES = ['ka', 'lo', 'mir', 'sen', 'ta', 'vel', 'ro', 'di', 'an', 'bre', 'sho', 'lu']
+DEFAULT_QUERIES = ['diamond', 'vint', 'royal pearl', 'gold', 'silver_plated', 'zzz']
+
+
+class Command(BaseCommand):
+    help = 'Compare full-text product search latency against icontains filtering'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Create products until the catalog holds this many (e.g. 100000)'
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--query', action='append', dest='queries')
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.seed(options['seed'])
+
+        total = Product.objects.count()
+        self.stdout.write(f'Catalog size: {total} products')
+        self.stdout.write(
+            f"{'query':<16}{'fts p50':>10}{'fts p95':>10}"
+            f"{'like p50':>10}{'like p95':>10}{'hits':>8}"
+        )
+        for term in options['queries'] or DEFAULT_QUERIES:
+            fts = self.measure(lambda: self.full_text(term), options['repeat'])
+            like = self.measure(lambda: self.icontains(term), options['repeat'])
+            hits = search_products(Product.objects.all(), term).count()
+            self.stdout.write(
+                f'{term:<16}{fts[0]:>10.2f}{fts[1]:>10.2f}'
+                f'{like[0]:>10.2f}{like[1]:>10.2f}{hits:>8}'
+            )
+        self.stdout.write('Latencies in ms: one COUNT plus the first page of 12 rows')
+
+    def full_text(self, term):
+        """The new search backend, ordered by relevance like the endpoint"""
+        queryset = search_products(Product.objects.all(), term)
+        query = queryset.query
+        if 'search_rank' in query.annotations or 'search_rank' in query.extra:
+            queryset = queryset.order_by('-search_rank', '-created_at')
+        return queryset
+
+    def icontains(self, term):
+        """The previous SearchFilter behaviour"""
+        query = Q()
+        for field in SEARCH_FIELDS:
+            query |= Q(**{f'{field}__icontains': term})
+        return Product.objects.filter(query)
+
+    def measure(self, build, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            queryset = build()
+            queryset.count()
+            list(queryset[:12])
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+    def seed(self, target):
+        missing = target - Product.objects.count()
+        if missing <= 0:
+            return
+        self.stdout.write(f'Seeding {missing} products...')
+        rng = random.Random(42)
+        # A few thousand filler words so descriptions aren't all alike
+        filler = [
+            ''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+            for _ in range(3000)
+        ]
+        categories = [choice for choice, _ in Product.Category.choices]
+        materials = [choice for choice, _ in Product.Material.choices]
+        batch = []
+        for _ in range(missing):
+            batch.append(Product(
+                name=' '.join(rng.sample(WORDS, 3)).title(),
+                description=' '.join(
+                    rng.choices(WORDS, k=3) + rng.choices(filler, k=40)
+                ),
+                price=rng.randint(10, 5000),
+                category=rng.choice(categories),
+                material=rng.choice(materials),
+                stock=rng.randint(0, 50)
+            ))
+            if len(batch) == 2000:
+                Product.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Product.objects.bulk_create(batch)
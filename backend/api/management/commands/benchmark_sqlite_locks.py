@@ -0,0 +1,99 @@
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.sqlite import get_pragmas, is_lock_error
+
+SCHEMA = [
+    'CREATE TABLE product (id INTEGER PRIMARY KEY, views INTEGER NOT NULL DEFAULT 0)',
+    'CREATE TABLE product_view (id INTEGER PRIMARY KEY, product_id INTEGER, viewed_at REAL)',
+]
+
+
+def run_worker(path, tuned, pragmas, ops, products, retries, results):
+    """One gunicorn-like worker: read a product, log a view, bump its counter"""
+    conn = sqlite3.connect(path, timeout=5.0, isolation_level=None)
+    if tuned:
+        for pragma in pragmas:
+            conn.execute(pragma)
+    errors = 0
+    done = 0
+    for i in range(ops):
+        product_id = i % products + 1
+        for attempt in range((retries if tuned else 0) + 1):
+            try:
+                conn.execute('BEGIN')
+                conn.execute('SELECT views FROM product WHERE id = ?', (product_id,)).fetchone()
+                conn.execute(
+                    'INSERT INTO product_view (product_id, viewed_at) VALUES (?, ?)',
+                    (product_id, time.time())
+                )
+                conn.execute('UPDATE product SET views = views + 1 WHERE id = ?', (product_id,))
+                conn.execute('COMMIT')
+                done += 1
+                break
+            except sqlite3.OperationalError as exc:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                if not is_lock_error(exc):
+                    raise
+                if not tuned or attempt == retries:
+                    errors += 1
+                    break
+                time.sleep(0.01 * (2 ** attempt))
+    conn.close()
+    results.put((done, errors))
+
+
+class Command(BaseCommand):
+    help = 'Measure SQLite lock errors and write throughput with and without tuning'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--ops', type=int, default=300, help='Writes per worker')
+        parser.add_argument('--products', type=int, default=20)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'mode':<10}{'writes/s':>12}{'ok':>8}{'locked':>8}{'error rate':>12}"
+        )
+        for tuned in (False, True):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                conn = sqlite3.connect(path, isolation_level=None)
+                for statement in SCHEMA:
+                    conn.execute(statement)
+                conn.executemany(
+                    'INSERT INTO product (id) VALUES (?)',
+                    [(i + 1,) for i in range(options['products'])]
+                )
+                conn.close()
+
+                results = multiprocessing.Queue()
+                workers = [
+                    multiprocessing.Process(target=run_worker, args=(
+                        path, tuned, get_pragmas(), options['ops'],
+                        options['products'], settings.SQLITE_LOCK_RETRIES, results
+                    ))
+                    for _ in range(options['workers'])
+                ]
+                start = time.perf_counter()
+                for worker in workers:
+                    worker.start()
+                totals = [results.get() for _ in workers]
+                for worker in workers:
+                    worker.join()
+                elapsed = time.perf_counter() - start
+
+            done = sum(result[0] for result in totals)
+            errors = sum(result[1] for result in totals)
+            attempted = done + errors
+            self.stdout.write(
+                f"{'tuned' if tuned else 'default':<10}{done / elapsed:>12.0f}"
+                f"{done:>8}{errors:>8}{errors / attempted:>12.1%}"
+            )
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.http import Http404
+
+from api.media import compress_model, model_name
+from api.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Write gzip/brotli variants of product 3D model files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Recompress files that already have variants'
+        )
+
+    def handle(self, *args, **options):
+        names = set()
+        for name, variants in (
+            Product.objects.exclude(model_3d='').exclude(model_3d__isnull=True)
+            .values_list('model_3d', 'model_3d_variants').iterator()
+        ):
+            names.add(name)
+            # Optimized copies and previews too
+            names.update(variants[kind] for kind in ('optimized', 'preview') if kind in variants)
+        compressed = missing = 0
+        for name in sorted(names):
+            try:
+                written = compress_model(model_name(name), options['force'])
+            except Http404:
+                missing += 1
+                self.stderr.write(f'Missing file: {name}')
+                continue
+            if written:
+                compressed += 1
+                self.stdout.write(f"{name}: {', '.join(written)}")
+        self.stdout.write(self.style.SUCCESS(
+            f'Compressed {compressed} model files, {missing} missing'
+        ))
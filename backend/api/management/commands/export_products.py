@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from api.bulk import FORMATS, export_rows, format_for, render_rows
+
+
+class Command(BaseCommand):
+    help = 'Stream every product to a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', default='-', help="File to write, or '-' for stdout")
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options['output']
+        file_format = options['format'] or format_for(path)
+        rows = render_rows(export_rows(chunk_size=options['chunk_size']), file_format)
+        if path == '-':
+            for text in rows:
+                self.stdout.write(text, ending='')
+            return
+        with open(path, 'w', encoding='utf-8', newline='') as stream:
+            for text in rows:
+                stream.write(text)
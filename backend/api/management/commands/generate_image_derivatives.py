@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.cache import invalidate_catalog
+from api.images import build_derivatives, needs_derivatives
+from api.models import ProductImage
+
+
+class Command(BaseCommand):
+    help = 'Render resized WebP/JPEG copies of uploaded product images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Re-render images that already have derivatives'
+        )
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument(
+            '--every', type=int, default=0,
+            help='Keep running, picking up new uploads every N seconds'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            built, failed = self.render_all(options['force'], options['batch_size'])
+            if built:
+                invalidate_catalog()
+            self.stdout.write(self.style.SUCCESS(f'Rendered {built} images, {failed} failed'))
+            if not options['every']:
+                return
+            options['force'] = False
+            close_old_connections()
+            time.sleep(options['every'])
+
+    def render_all(self, force, batch_size):
+        built = failed = 0
+        uploads = ProductImage.objects.exclude(image='').exclude(image__isnull=True).order_by('pk')
+        last_pk = 0
+        # Primary-key batches: the rows are updated while we walk them
+        while True:
+            batch = list(uploads.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                return built, failed
+            for image in batch:
+                if not force and not needs_derivatives(image):
+                    continue
+                try:
+                    build_derivatives(image)
+                except (OSError, ValueError) as exc:
+                    failed += 1
+                    self.stderr.write(f'Image {image.pk} ({image.image.name}): {exc}')
+                    continue
+                built += 1
+            last_pk = batch[-1].pk
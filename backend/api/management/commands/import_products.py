@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.bulk import FORMATS, format_for, import_products, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Upsert products by SKU from a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for stdin")
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or format_for(path)
+        if path == '-':
+            stream = sys.stdin
+        else:
+            try:
+                stream = open(path, encoding='utf-8-sig', newline='')
+            except OSError as exc:
+                raise CommandError(exc)
+
+        try:
+            result = import_products(
+                read_rows(stream, file_format), chunk_size=options['chunk_size']
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        for error in result.errors:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        if result.failed > len(result.errors):
+            self.stderr.write(f'... and {result.failed - len(result.errors)} more failed rows')
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {result.created}, updated {result.updated}, '
+            f'unchanged {result.unchanged}, failed {result.failed}'
+        ))
@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.cache import invalidate_catalog
+from api.gltf import ModelError
+from api.media import optimize_model
+from api.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Build optimized copies and low-poly previews of uploaded 3D models'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Rebuild every model instead of only the queued ones'
+        )
+        parser.add_argument(
+            '--every', type=int, default=0,
+            help='Keep running as a worker, checking for new uploads every N seconds'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            ready, failed = self.optimize_queued(options['force'])
+            if ready or failed:
+                invalidate_catalog()
+            self.stdout.write(self.style.SUCCESS(f'Optimized {ready} models, {failed} failed'))
+            if not options['every']:
+                return
+            options['force'] = False
+            close_old_connections()
+            time.sleep(options['every'])
+
+    def optimize_queued(self, force):
+        products = Product.objects.exclude(model_3d='').exclude(model_3d__isnull=True)
+        if not force:
+            products = products.filter(model_3d_status=Product.ModelStatus.PENDING)
+        ready = failed = 0
+        for pk in list(products.values_list('pk', flat=True)):
+            product = Product.objects.filter(pk=pk).only('model_3d').first()
+            if product is None or not product.model_3d:
+                continue
+            source = product.model_3d.name
+            try:
+                variants = optimize_model(product)
+                status = Product.ModelStatus.READY
+            except (ModelError, OSError) as exc:
+                variants = {'source': source, 'error': str(exc)[:500]}
+                status = Product.ModelStatus.FAILED
+                self.stderr.write(f'Product {pk} ({source}): {exc}')
+
+            # Unless the model was replaced meanwhile, which queued it again
+            if Product.objects.filter(pk=pk, model_3d=source).update(
+                model_3d_status=status, model_3d_variants=variants
+            ):
+                if status == Product.ModelStatus.READY:
+                    ready += 1
+                    self.stdout.write(
+                        f"{source}: {variants['original_size']} -> "
+                        f"{variants['optimized_size']} bytes, preview {variants['preview_size']}"
+                    )
+                else:
+                    failed += 1
+        return ready, failed
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.retention import convert_to_partitioned, ensure_future_partitions, is_partitioned
+
+
+class Command(BaseCommand):
+    help = 'Partition the product view log by month (Postgres only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead', type=int, default=3,
+            help='Create partitions this many months into the future'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Native partitioning needs a PostgreSQL database')
+
+        if is_partitioned():
+            ensure_future_partitions(options['months_ahead'])
+            self.stdout.write(self.style.SUCCESS('Future partitions are in place'))
+            return
+
+        convert_to_partitioned(options['months_ahead'])
+        self.stdout.write(self.style.SUCCESS('Converted the product view log to monthly partitions'))
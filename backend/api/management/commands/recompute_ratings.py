@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from api.cache import invalidate_catalog
+from api.models import Product, Review
+from api.ratings import average_rating
+
+
+class Command(BaseCommand):
+    help = 'Recompute product ratings and review counts from reviews'
+
+    def handle(self, *args, **kwargs):
+        stats = {
+            row['product']: (row['total'], row['count'])
+            for row in Review.objects.order_by().values('product').annotate(
+                total=Sum('rating'),
+                count=Count('id')
+            )
+        }
+
+        changed = []
+        products = Product.objects.only('id', 'rating', 'review_count', 'rating_total')
+        for product in products.iterator(chunk_size=2000):
+            total, count = stats.get(product.id, (0, 0))
+            rating = average_rating(total, count)
+            if (product.rating_total, product.review_count, product.rating) != (total, count, rating):
+                product.rating_total = total
+                product.review_count = count
+                product.rating = rating
+                changed.append(product)
+
+        with transaction.atomic():
+            Product.objects.bulk_update(
+                changed, ['rating_total', 'review_count', 'rating'], batch_size=500
+            )
+        if changed:
+            invalidate_catalog()
+
+        self.stdout.write(self.style.SUCCESS(f'Repaired ratings for {len(changed)} products'))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.retention import rollup_views
+
+
+class Command(BaseCommand):
+    help = 'Roll old product views into daily summaries and delete the raw rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=90,
+            help='Keep raw views for this many days (default 90)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Delete raw views in batches of this many rows'
+        )
+        parser.add_argument(
+            '--every', type=int, default=0,
+            help='Keep running and repeat every N seconds (scheduled mode)'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            summarized, deleted, dropped = rollup_views(
+                options['days'],
+                batch_size=options['batch_size'],
+                log=self.stdout.write
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'Summarized {summarized} days, deleted {deleted} raw views, '
+                f'dropped {dropped} partitions'
+            ))
+            if not options['every']:
+                return
+            close_old_connections()
+            time.sleep(options['every'])
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from api.cache import invalidate_catalog
+from api.pricing import (
+    next_offer_boundary, refresh_effective_prices, refresh_offer_states, stale_products
+)
+
+
+class Command(BaseCommand):
+    help = 'Apply offer start/end boundaries to offer states and product prices'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Recompute every product instead of only the stale ones'
+        )
+        parser.add_argument(
+            '--every', type=int, default=0,
+            help='Keep running, waking at each offer boundary or every N seconds'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            flipped = refresh_offer_states()
+            products = None if options['all'] else stale_products()
+            updated = refresh_effective_prices(products)
+            if flipped or updated:
+                invalidate_catalog()
+            self.stdout.write(self.style.SUCCESS(
+                f'Flipped {flipped} offers, repriced {updated} products'
+            ))
+            if not options['every']:
+                return
+
+            delay = options['every']
+            boundary = next_offer_boundary()
+            if boundary is not None:
+                # Offers stay live through end_date, so wake just after it
+                delay = min(delay, max((boundary - timezone.now()).total_seconds() + 1, 1))
+            close_old_connections()
+            time.sleep(delay)
@@ -0,0 +1,301 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_safe
+
+from . import gltf
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip variants are made
+    brotli = None
+
+MODEL_DIR = 'models'
+# Optimized copies and previews, inside MODEL_DIR
+VARIANT_DIR = 'variants'
+CHUNK_SIZE = 64 * 1024
+CONTENT_TYPES = {
+    '.glb': 'model/gltf-binary',
+    '.gltf': 'model/gltf+json',
+    '.bin': 'application/octet-stream',
+}
+# Precompressed variants, in order of preference
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+# Mid-range levels: on mesh data, brotli 5 compresses as well as 9 in a
+# fifth of the time, and gzip 9 gains nothing over 6
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+# A variant is only kept if it saves at least this fraction of the bytes
+MIN_SAVING = 0.05
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=0, must-revalidate'
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def model_name(name):
+    """A storage name relative to MODEL_DIR, as serve_model takes it"""
+    return name.removeprefix(f'{MODEL_DIR}/')
+
+
+def model_path(name):
+    """Filesystem path of a model file, or Http404 for names outside MODEL_DIR"""
+    try:
+        path = default_storage.path(f'{MODEL_DIR}/{name}')
+    except (SuspiciousFileOperation, NotImplementedError):
+        raise Http404
+    if not os.path.isfile(path):
+        raise Http404
+    return path
+
+
+def content_hash(path, stat):
+    """
+    SHA-256 prefix of a file's bytes, cached per (path, size, mtime) so the
+    file is only read once per change.
+    """
+    key = f'media:hash:{path}:{stat.st_size}:{stat.st_mtime_ns}'
+    digest = cache.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as source:
+            for chunk in iter(lambda: source.read(1024 * 1024), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()[:20]
+        cache.set(key, digest, timeout=None)
+    return digest
+
+
+def model_version(name):
+    """Version token for a model file's URL, None if the file is missing"""
+    try:
+        path = model_path(name)
+    except Http404:
+        return None
+    return content_hash(path, os.stat(path))
+
+
+def model_url(name):
+    """Storage URL of a model file, versioned by content when it exists"""
+    url = default_storage.url(name)
+    version = model_version(model_name(name))
+    return f'{url}?v={version}' if version else url
+
+
+def variant_path(path, stat, suffix):
+    """A precompressed variant written after the current original, if any"""
+    variant = path + suffix
+    try:
+        variant_stat = os.stat(variant)
+    except OSError:
+        return None
+    if variant_stat.st_mtime_ns < stat.st_mtime_ns:
+        # Left over from a file that has since been replaced
+        return None
+    return variant
+
+
+def compress_model(name, force=False):
+    """
+    Write .gz (and, with the brotli package, .br) variants next to a model
+    file. Variants that would barely shrink it are skipped. Returns the
+    encodings written.
+    """
+    path = model_path(name)
+    stat = os.stat(path)
+    # Remembers encodings that didn't pay off, so they aren't retried on
+    # every save of the product
+    skip_key = f'media:incompressible:{path}:{stat.st_size}:{stat.st_mtime_ns}'
+    skipped = set() if force else cache.get(skip_key, set())
+    encodings = [
+        (encoding, suffix) for encoding, suffix in ENCODINGS
+        if (encoding != 'br' or brotli is not None) and encoding not in skipped
+        and (force or not variant_path(path, stat, suffix))
+    ]
+    if not encodings:
+        return []
+
+    with open(path, 'rb') as source:
+        data = source.read()
+    written = []
+    for encoding, suffix in encodings:
+        if encoding == 'br':
+            compressed = brotli.compress(data, quality=BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+        if len(compressed) > len(data) * (1 - MIN_SAVING):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+            skipped.add(encoding)
+            continue
+        with open(path + suffix + '.tmp', 'wb') as target:
+            target.write(compressed)
+        os.replace(path + suffix + '.tmp', path + suffix)
+        written.append(encoding)
+    cache.set(skip_key, skipped, timeout=None)
+    return written
+
+
+def store_variant(content, stem, kind):
+    """Save an optimized model under a name derived from its content"""
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    name = f'{MODEL_DIR}/{VARIANT_DIR}/{stem}-{digest}.{kind}.glb'
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(content))
+    return name
+
+
+def optimize_model(product):
+    """
+    Build the optimized copy and low-poly preview of a product's 3D model,
+    with their precompressed variants. Returns the model_3d_variants dict;
+    raises gltf.ModelError for files the optimizer can't process.
+    """
+    source = product.model_3d.name
+    with product.model_3d.open('rb') as model_file:
+        data = model_file.read()
+    model = gltf.load(data)
+    stem = os.path.splitext(os.path.basename(source))[0]
+
+    variants = {'source': source, 'original_size': len(data)}
+    for kind, build in (('optimized', gltf.optimize), ('preview', gltf.build_preview)):
+        content = build(model)
+        if kind == 'optimized' and len(content) >= len(data):
+            # Already compact: keep serving the upload itself
+            variants['optimized'], variants['optimized_size'] = source, len(data)
+            continue
+        name = store_variant(content, stem, kind)
+        compress_model(model_name(name))
+        variants[kind], variants[f'{kind}_size'] = name, len(content)
+    return variants
+
+
+def accepted_encodings(request):
+    """Content codings the client accepts, leaving out ones with q=0"""
+    accepted = set()
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        coding, *params = part.split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def parse_range(header, size):
+    """
+    (start, end) of a single `bytes=` range, inclusive. None means the
+    header should be ignored (absent, malformed or multi-range) and the
+    whole file served; ValueError means the range can't be satisfied.
+    """
+    match = RANGE_RE.match(header.replace(' ', '')) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        if last and int(last) < start:
+            return None
+        raise ValueError
+    return start, end
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as source:
+        source.seek(start)
+        while length > 0:
+            chunk = source.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_model(request, name):
+    """
+    Serve a 3D model file with strong ETags, single-range requests and
+    precompressed variants. Versioned URLs (`?v=<hash>`, as the product
+    serializer emits) are cacheable for a year.
+    """
+    path = model_path(name)
+    stat = os.stat(path)
+    digest = content_hash(path, stat)
+    extension = os.path.splitext(path)[1].lower()
+    content_type = CONTENT_TYPES.get(extension) or (
+        mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    )
+    headers = {
+        'Accept-Ranges': 'bytes',
+        'Vary': 'Accept-Encoding',
+        'Last-Modified': formatdate(stat.st_mtime, usegmt=True),
+        'Cache-Control': IMMUTABLE if request.GET.get('v') == digest else REVALIDATE,
+    }
+
+    # Byte ranges always address the uncompressed file
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if range_header and (if_range is None or if_range == f'"{digest}"'):
+        try:
+            byte_range = parse_range(range_header, stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416, headers=headers)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+
+    encoding, serve_path = None, path
+    if byte_range is None:
+        accepted = accepted_encodings(request)
+        for candidate, suffix in ENCODINGS:
+            if candidate in accepted:
+                variant = variant_path(path, stat, suffix)
+                if variant:
+                    encoding, serve_path = candidate, variant
+                    break
+
+    etag = f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+    headers['ETag'] = etag
+    if_none_match = request.headers.get('If-None-Match', '')
+    if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+        return HttpResponse(status=304, headers=headers)
+
+    if byte_range is not None:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            read_range(path, start, length), status=206,
+            content_type=content_type, headers=headers
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = str(length)
+        return response
+
+    response = FileResponse(
+        open(serve_path, 'rb'), content_type=content_type, headers=headers
+    )
+    response.block_size = CHUNK_SIZE
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
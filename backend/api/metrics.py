@@ -0,0 +1,57 @@
+import time
+
+from django.core.cache import cache
+
+# Per-minute buckets are kept for a day
+METRIC_TIMEOUT = 60 * 60 * 24
+LOGIN_OUTCOMES = ('success', 'failure')
+
+
+def minute_bucket(timestamp=None):
+    return int((timestamp or time.time()) // 60)
+
+
+def _incr(key, delta):
+    # Redis adds and increments atomically. The database cache backend
+    # reads and rewrites the value, so concurrent logins in different
+    # workers can overwrite each other's counts: without Redis the rates
+    # are approximate
+    if cache.add(key, delta, timeout=METRIC_TIMEOUT):
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.set(key, delta, timeout=METRIC_TIMEOUT)
+
+
+def record_login(outcome, duration):
+    """Count a login attempt and its duration in the current minute bucket"""
+    bucket = minute_bucket()
+    _incr(f'metrics:login:{outcome}:{bucket}', 1)
+    _incr(f'metrics:login:{outcome}:ms:{bucket}', int(duration * 1000))
+
+
+def login_rates(minutes=60):
+    """
+    Login attempts per minute for the last `minutes` minutes, oldest first,
+    with the average handling time of each outcome in milliseconds.
+    """
+    current = minute_bucket()
+    buckets = range(current - minutes + 1, current + 1)
+    keys = [
+        f'metrics:login:{outcome}:{suffix}{bucket}'
+        for bucket in buckets
+        for outcome in LOGIN_OUTCOMES
+        for suffix in ('', 'ms:')
+    ]
+    values = cache.get_many(keys)
+    series = []
+    for bucket in buckets:
+        row = {'minute': bucket * 60}
+        for outcome in LOGIN_OUTCOMES:
+            count = values.get(f'metrics:login:{outcome}:{bucket}', 0)
+            total_ms = values.get(f'metrics:login:{outcome}:ms:{bucket}', 0)
+            row[outcome] = count
+            row[f'{outcome}_avg_ms'] = round(total_ms / count, 1) if count else None
+        series.append(row)
+    return series
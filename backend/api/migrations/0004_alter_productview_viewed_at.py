@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-17 19:54
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_alter_order_total_alter_orderitem_price_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='productview',
+            name='viewed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,126 @@
+from django.db import migrations
+
+# The SQL is copied here as it was when this migration was written, so later
+# changes to api.search don't alter what this migration does. api.search
+# keeps the current version for the post_migrate reinstall.
+
+# Postgres: a tsvector column kept current by a trigger, with a GIN index
+POSTGRES_FORWARD_SQL = [
+    "ALTER TABLE api_product ADD COLUMN search_vector tsvector",
+    """
+    CREATE FUNCTION api_product_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.category, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.material, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER api_product_search_vector_insert
+    BEFORE INSERT ON api_product
+    FOR EACH ROW EXECUTE FUNCTION api_product_search_vector_update()
+    """,
+    """
+    CREATE TRIGGER api_product_search_vector_update
+    BEFORE UPDATE OF name, description, category, material ON api_product
+    FOR EACH ROW
+    WHEN (OLD.name IS DISTINCT FROM NEW.name
+          OR OLD.description IS DISTINCT FROM NEW.description
+          OR OLD.category IS DISTINCT FROM NEW.category
+          OR OLD.material IS DISTINCT FROM NEW.material)
+    EXECUTE FUNCTION api_product_search_vector_update()
+    """,
+    # Fill the column for existing products
+    """
+    UPDATE api_product SET search_vector =
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(category, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(material, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    """,
+    "CREATE INDEX api_product_search_vector_gin ON api_product USING gin (search_vector)",
+]
+
+POSTGRES_REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS api_product_search_vector_update ON api_product",
+    "DROP TRIGGER IF EXISTS api_product_search_vector_insert ON api_product",
+    "DROP FUNCTION IF EXISTS api_product_search_vector_update()",
+    "ALTER TABLE api_product DROP COLUMN IF EXISTS search_vector",
+]
+
+# SQLite: an external-content FTS5 table synced by triggers. The update
+# trigger only fires for the indexed columns, so counter updates are free.
+SQLITE_FORWARD_SQL = [
+    """
+    CREATE VIRTUAL TABLE api_product_fts USING fts5(
+        name, description, category, material,
+        content='api_product', content_rowid='id',
+        tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER api_product_fts_ai AFTER INSERT ON api_product BEGIN
+        INSERT INTO api_product_fts(rowid, name, description, category, material)
+        VALUES (new.id, new.name, new.description, new.category, new.material);
+    END
+    """,
+    """
+    CREATE TRIGGER api_product_fts_ad AFTER DELETE ON api_product BEGIN
+        INSERT INTO api_product_fts(api_product_fts, rowid, name, description, category, material)
+        VALUES ('delete', old.id, old.name, old.description, old.category, old.material);
+    END
+    """,
+    """
+    CREATE TRIGGER api_product_fts_au
+    AFTER UPDATE OF name, description, category, material ON api_product BEGIN
+        INSERT INTO api_product_fts(api_product_fts, rowid, name, description, category, material)
+        VALUES ('delete', old.id, old.name, old.description, old.category, old.material);
+        INSERT INTO api_product_fts(rowid, name, description, category, material)
+        VALUES (new.id, new.name, new.description, new.category, new.material);
+    END
+    """,
+    "INSERT INTO api_product_fts(api_product_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS api_product_fts_au",
+    "DROP TRIGGER IF EXISTS api_product_fts_ad",
+    "DROP TRIGGER IF EXISTS api_product_fts_ai",
+    "DROP TABLE IF EXISTS api_product_fts",
+]
+
+
+def run_statements(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        run_statements(schema_editor, POSTGRES_FORWARD_SQL)
+    elif vendor == 'sqlite':
+        run_statements(schema_editor, SQLITE_REVERSE_SQL + SQLITE_FORWARD_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        run_statements(schema_editor, POSTGRES_REVERSE_SQL)
+    elif vendor == 'sqlite':
+        run_statements(schema_editor, SQLITE_REVERSE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_alter_productview_viewed_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:06
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_rating_totals(apps, schema_editor):
+    Product = apps.get_model('api', 'Product')
+    Review = apps.get_model('api', 'Review')
+    products = []
+    for row in Review.objects.order_by().values('product').annotate(
+        total=Sum('rating'), count=Count('id')
+    ):
+        products.append(Product(
+            id=row['product'], rating_total=row['total'], review_count=row['count']
+        ))
+    Product.objects.bulk_update(products, ['rating_total', 'review_count'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_remove_product_api_product_price_b6b1d7_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_total',
+            field=models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+        migrations.RunPython(fill_rating_totals, migrations.RunPython.noop),
+    ]
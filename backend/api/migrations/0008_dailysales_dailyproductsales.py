@@ -0,0 +1,86 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def fill_rollups(apps, schema_editor):
+    # Same as the backfill_sales_rollups command, on the historical models
+    Order = apps.get_model('api', 'Order')
+    OrderItem = apps.get_model('api', 'OrderItem')
+    DailySales = apps.get_model('api', 'DailySales')
+    DailyProductSales = apps.get_model('api', 'DailyProductSales')
+    days = (
+        Order.objects.filter(status='delivered')
+        .annotate(date=TruncDate('created_at'))
+        .order_by()
+        .values('date')
+        .annotate(revenue=Sum('total'), order_count=Count('id'))
+    )
+    product_days = (
+        OrderItem.objects.filter(order__status='delivered')
+        .annotate(date=TruncDate('order__created_at'))
+        .order_by()
+        .values('date', 'product')
+        .annotate(
+            units=Sum('quantity'),
+            line_revenue=Sum(ExpressionWrapper(
+                F('price') * F('quantity'),
+                output_field=DecimalField(max_digits=15, decimal_places=2)
+            ))
+        )
+    )
+    DailySales.objects.bulk_create(
+        [DailySales(**row) for row in days.iterator()], batch_size=1000
+    )
+    DailyProductSales.objects.bulk_create(
+        [
+            DailyProductSales(
+                date=row['date'], product_id=row['product'],
+                quantity=row['units'], revenue=row['line_revenue']
+            )
+            for row in product_days.iterator()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_product_rating_total'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('order_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Daily sales',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='api.product')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily product sales',
+                'ordering': ['-date'],
+                'unique_together': {('date', 'product')},
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
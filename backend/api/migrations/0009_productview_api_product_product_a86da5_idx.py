@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_dailysales_dailyproductsales'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productview',
+            index=models.Index(fields=['product', 'viewed_at'], name='api_product_product_a86da5_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_productview_api_product_product_a86da5_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductViewDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('views', models.IntegerField(default=0)),
+                ('unique_ips', models.IntegerField(default=0)),
+                ('unique_users', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Product view daily summaries',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='productview',
+            index=models.Index(fields=['viewed_at'], name='api_product_viewed__076950_idx'),
+        ),
+        migrations.AddField(
+            model_name='productviewdaily',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_views', to='api.product'),
+        ),
+        migrations.AddIndex(
+            model_name='productviewdaily',
+            index=models.Index(fields=['date'], name='api_product_date_ab327e_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='productviewdaily',
+            unique_together={('product', 'date')},
+        ),
+    ]
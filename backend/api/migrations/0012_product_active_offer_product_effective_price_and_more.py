@@ -0,0 +1,55 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Round
+from django.utils import timezone
+
+
+def fill_effective_prices(apps, schema_editor):
+    Product = apps.get_model('api', 'Product')
+    Offer = apps.get_model('api', 'Offer')
+    now = timezone.now()
+    offer = Offer.objects.filter(
+        products=OuterRef('pk'), active=True, start_date__lte=now, end_date__gte=now
+    ).order_by('id')
+    discount = Subquery(offer.values('discount_percentage')[:1])
+    Product.objects.update(
+        active_offer_id=Subquery(offer.values('id')[:1]),
+        effective_price=Coalesce(
+            Round(
+                ExpressionWrapper(
+                    F('price') * (Value(100) - discount) / Value(100),
+                    output_field=DecimalField(max_digits=15, decimal_places=2)
+                ),
+                2
+            ),
+            F('price')
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_user_api_user_email_ci_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='active_offer',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.offer'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=15),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['effective_price', 'id'], name='api_product_effecti_354b74_idx'),
+        ),
+        migrations.RunPython(fill_effective_prices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:31
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_is_live(apps, schema_editor):
+    Offer = apps.get_model('api', 'Offer')
+    now = timezone.now()
+    Offer.objects.filter(
+        active=True, start_date__lte=now, end_date__gte=now
+    ).update(is_live=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_product_active_offer_product_effective_price_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offer',
+            name='is_live',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='offer',
+            index=models.Index(fields=['active', 'start_date', 'end_date'], name='api_offer_active_987575_idx'),
+        ),
+        migrations.RunPython(fill_is_live, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:33
+
+from django.db import migrations, models
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat
+
+
+def fill_skus(apps, schema_editor):
+    # Existing products get the same default SKU as new ones (api.bulk.default_sku)
+    Product = apps.get_model('api', 'Product')
+    Product.objects.filter(sku__isnull=True).update(
+        sku=Concat(Value('P'), Cast('id', CharField()))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_offer_is_live_offer_api_offer_active_987575_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='sku',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(fill_skus, migrations.RunPython.noop),
+    ]
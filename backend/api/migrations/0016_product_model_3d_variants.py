@@ -0,0 +1,31 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:50
+
+from django.db import migrations, models
+
+
+def queue_existing_models(apps, schema_editor):
+    Product = apps.get_model('api', 'Product')
+    Product.objects.exclude(model_3d='').exclude(model_3d__isnull=True).update(
+        model_3d_status='pending'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_productimage_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='model_3d_status',
+            field=models.CharField(blank=True, choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], db_index=True, editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='model_3d_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(queue_existing_models, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_product_model_3d_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', '-created_at'], name='api_review_product_f5d109_idx'),
+        ),
+    ]
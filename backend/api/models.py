@@ -1,6 +1,8 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -20,6 +22,17 @@ class User(AbstractUser):
     avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
     phone = models.CharField(max_length=20, blank=True)
     
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            # Case-insensitive unique email, also the index used for
+            # email logins (see EmailOrUsernameBackend)
+            models.UniqueConstraint(
+                Lower('email'),
+                name='api_user_email_ci_unique',
+                condition=~models.Q(email='')
+            ),
+        ]
+    
     def __str__(self):
         return f"{self.username} ({self.role})"
 
@@ -41,7 +54,14 @@ class Product(models.Model):
         GOLD_PLATED = 'gold_plated', 'Gold Plated'
         SILVER_PLATED = 'silver_plated', 'Silver Plated'
     
+    class ModelStatus(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        READY = 'ready', 'Ready'
+        FAILED = 'failed', 'Failed'
+    
     name = models.CharField(max_length=255)
+    # Stock keeping unit, the key bulk imports match existing products on
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)
     description = models.TextField()
     price = models.DecimalField(max_digits=15, decimal_places=2)
     original_price = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
@@ -58,7 +78,27 @@ class Product(models.Model):
         validators=[MinValueValidator(0), MaxValueValidator(5)]
     )
     review_count = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+    # Sum of all review ratings, so `rating` can be maintained incrementally
+    rating_total = models.IntegerField(default=0, validators=[MinValueValidator(0)])
     model_3d = models.FileField(upload_to='models/', null=True, blank=True)
+    # Optimized copy and low-poly preview of model_3d, built by the
+    # optimize_models worker: {'source': file name, 'original_size',
+    # 'optimized', 'optimized_size', 'preview', 'preview_size', 'error'}
+    model_3d_status = models.CharField(
+        max_length=10, choices=ModelStatus.choices, blank=True, db_index=True, editable=False
+    )
+    model_3d_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # The live offer with the lowest id and the price after its discount,
+    # maintained by api.pricing so price filters and sorting need no join
+    active_offer = models.ForeignKey(
+        'Offer',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+'
+    )
+    effective_price = models.DecimalField(max_digits=15, decimal_places=2, default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -67,11 +107,33 @@ class Product(models.Model):
         indexes = [
             models.Index(fields=['category']),
             models.Index(fields=['material']),
-            models.Index(fields=['price']),
+            # Composite indexes backing keyset pagination for each sort_by
+            models.Index(fields=['price', 'id']),
+            models.Index(fields=['effective_price', 'id']),
+            models.Index(fields=['likes', 'views', 'id']),
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['rating', 'id']),
         ]
     
     def __str__(self):
         return self.name
+    
+    @property
+    def current_offer(self):
+        """
+        The stored active offer while its window is open. The stored offer
+        only changes when sync_offers runs, so one that has ended since is
+        ignored rather than discounting past its end_date.
+        """
+        offer = self.active_offer
+        if offer is not None and offer.is_current():
+            return offer
+        return None
+    
+    @property
+    def current_price(self):
+        """effective_price, or the list price once the stored offer has ended"""
+        return self.effective_price if self.current_offer else self.price
 
 
 class ProductImage(models.Model):
@@ -81,6 +143,9 @@ class ProductImage(models.Model):
     image_url = models.URLField(max_length=500, blank=True, null=True)
     alt_text = models.CharField(max_length=255, blank=True)
     order = models.IntegerField(default=0)
+    # Resized copies of the uploaded file, filled in by api.images:
+    # {'source': file name, size: {'width', 'height', format: file name}}
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)
     
     class Meta:
         ordering = ['order']
@@ -101,11 +166,24 @@ class Offer(models.Model):
     start_date = models.DateTimeField()
     end_date = models.DateTimeField()
     active = models.BooleanField(default=True)
+    # Whether the offer's window covers the current time, set on save and
+    # flipped at start/end boundaries by the sync_offers command
+    is_live = models.BooleanField(default=False, editable=False, db_index=True)
     products = models.ManyToManyField(Product, related_name='offers', blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['active', 'start_date', 'end_date']),
+        ]
+    
     def __str__(self):
         return self.title
+    
+    def is_current(self, now=None):
+        """Whether the offer is active and its window covers `now`"""
+        now = now or timezone.now()
+        return self.active and self.start_date <= now <= self.end_date
 
 
 class Order(models.Model):
@@ -135,6 +213,10 @@ class Order(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['user', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"Order #{self.id} - {self.user.username}"
@@ -177,6 +259,10 @@ class Review(models.Model):
     class Meta:
         unique_together = ('user', 'product')
         ordering = ['-created_at']
+        indexes = [
+            # A product's reviews, newest first
+            models.Index(fields=['product', '-created_at']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.product.name} ({self.rating}★)"
@@ -200,7 +286,63 @@ class ProductView(models.Model):
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='product_views')
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    viewed_at = models.DateTimeField(auto_now_add=True)
+    viewed_at = models.DateTimeField(default=timezone.now, editable=False)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'viewed_at']),
+            models.Index(fields=['viewed_at']),
+        ]
     
     def __str__(self):
         return f"{self.product.name} viewed at {self.viewed_at}"
+
+
+class ProductViewDaily(models.Model):
+    """Daily summary of ProductView rows that have aged out of the raw log"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_views')
+    date = models.DateField()
+    views = models.IntegerField(default=0)
+    unique_ips = models.IntegerField(default=0)
+    unique_users = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('product', 'date')
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+        verbose_name_plural = 'Product view daily summaries'
+    
+    def __str__(self):
+        return f"{self.product.name}: {self.views} views on {self.date}"
+
+
+class DailySales(models.Model):
+    """Daily rollup of delivered orders, keyed by order date"""
+    date = models.DateField(unique=True)
+    revenue = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    order_count = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-date']
+        verbose_name_plural = 'Daily sales'
+    
+    def __str__(self):
+        return f"{self.date}: {self.order_count} orders"
+
+
+class DailyProductSales(models.Model):
+    """Daily per-product rollup of delivered order items"""
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    
+    class Meta:
+        unique_together = ('date', 'product')
+        ordering = ['-date']
+        verbose_name_plural = 'Daily product sales'
+    
+    def __str__(self):
+        return f"{self.date}: {self.quantity}x {self.product.name}"
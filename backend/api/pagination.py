@@ -0,0 +1,142 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over the queryset's own ordering.
+
+    The ordering is extended with `id` as a tiebreaker, and each page is
+    fetched with a WHERE clause on the last row's sort values instead of an
+    OFFSET, so deep pages cost the same as the first one and no COUNT(*)
+    is run.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, queryset):
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        if not any(
+            isinstance(field, str) and field.lstrip('-') in ('id', 'pk')
+            for field in ordering
+        ):
+            descending = (
+                bool(ordering) and isinstance(ordering[-1], str) and
+                ordering[-1].startswith('-')
+            )
+            ordering.append('-id' if descending else 'id')
+        return ordering
+
+    def supports(self, queryset):
+        """Keyset pagination needs every sort key to be a concrete model field"""
+        for field in self.get_ordering(queryset):
+            if not isinstance(field, str):
+                return False
+            name = field.lstrip('-')
+            if name == 'pk':
+                continue
+            try:
+                queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return False
+        return True
+
+    def encode_cursor(self, obj):
+        values = []
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip('-'))
+            if isinstance(value, Decimal):
+                value = str(value)
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            values.append(value)
+        raw = json.dumps(values, separators=(',', ':')).encode('ascii')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def build_seek_filter(self, values):
+        """
+        (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z) ...
+        with the comparison flipped for descending fields.
+        """
+        seek = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            seek |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return seek
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        queryset = queryset.order_by(*self.ordering)
+
+        values = self.decode_cursor(request)
+        if values is not None:
+            queryset = queryset.filter(self.build_seek_filter(values))
+
+        # Fetch one extra row to know whether there is a next page
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data
+        })
+
+
+class OptionalKeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination by default. Passing a `cursor` query parameter
+    (empty for the first page) opts in to keyset pagination, which is what
+    infinite scroll should use.
+    """
+
+    def __init__(self):
+        self.keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if KeysetPagination.cursor_query_param in request.query_params:
+            keyset = KeysetPagination()
+            if keyset.supports(queryset):
+                self.keyset = keyset
+                return keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -35,4 +35,4 @@ class IsOwnerOrAdmin(permissions.BasePermission):
             return True
         
         # Write permissions are only allowed to the owner or admin
-        return obj.user == request.user or request.user.role == 'admin'
+        return obj.user_id == request.user.pk or request.user.role == 'admin'
@@ -0,0 +1,105 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import (
+    DecimalField, ExpressionWrapper, F, Min, OuterRef, Q, Subquery, Value
+)
+from django.db.models.functions import Coalesce, Round
+from django.utils import timezone
+
+from .models import Offer, Product
+
+CENTS = Decimal('0.01')
+
+
+def discounted_price(price, discount_percentage):
+    """Price after a percentage discount, rounded to cents"""
+    price = Decimal(str(price))
+    if discount_percentage is None:
+        return price
+    discount = Decimal(str(discount_percentage))
+    return (price * (100 - discount) / 100).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def window_q(now, prefix=''):
+    return Q(**{
+        f'{prefix}active': True,
+        f'{prefix}start_date__lte': now,
+        f'{prefix}end_date__gte': now,
+    })
+
+
+def live_offers(now=None):
+    """
+    Offers whose window covers `now`. Read from the dates rather than
+    `is_live`, which lags until sync_offers runs.
+    """
+    return Offer.objects.filter(window_q(now or timezone.now()))
+
+
+def refresh_offer_states(now=None):
+    """
+    Flip `is_live` on offers whose window started or ended. Both UPDATEs
+    touch only the offers that change state. Returns the number flipped.
+    """
+    now = now or timezone.now()
+    started = Offer.objects.filter(window_q(now), is_live=False).update(is_live=True)
+    ended = Offer.objects.filter(is_live=True).exclude(window_q(now)).update(is_live=False)
+    return started + ended
+
+
+def live_offer_for_product():
+    """The live offer a product's price follows: the one with the lowest id"""
+    return Offer.objects.filter(is_live=True, products=OuterRef('pk')).order_by('id')
+
+
+def refresh_effective_prices(products=None):
+    """
+    Recompute `active_offer` and `effective_price` for `products` (all
+    products by default) in a single UPDATE. Returns the number of rows.
+    """
+    products = Product.objects.all() if products is None else products
+    offer = live_offer_for_product()
+    discount = Subquery(offer.values('discount_percentage')[:1])
+    return products.update(
+        active_offer_id=Subquery(offer.values('id')[:1]),
+        effective_price=Coalesce(
+            Round(
+                ExpressionWrapper(
+                    F('price') * (Value(100) - discount) / Value(100),
+                    output_field=DecimalField(max_digits=15, decimal_places=2)
+                ),
+                2
+            ),
+            F('price')
+        )
+    )
+
+
+def stale_products():
+    """
+    Products whose stored active offer no longer matches the live one,
+    e.g. because an offer started or ended since the last refresh. Only
+    products that belong to an offer or have one stored are checked.
+    """
+    live_id = Subquery(live_offer_for_product().values('id')[:1])
+    candidates = Product.objects.filter(
+        Q(pk__in=Offer.products.through.objects.values('product_id')) |
+        Q(active_offer__isnull=False)
+    )
+    # Spelled out because `active_offer != live_id` is NULL when either is
+    return candidates.alias(live_id=live_id).filter(
+        Q(active_offer__isnull=True, live_id__isnull=False) |
+        Q(active_offer__isnull=False, live_id__isnull=True) |
+        (Q(active_offer__isnull=False, live_id__isnull=False) & ~Q(active_offer=F('live_id')))
+    )
+
+
+def next_offer_boundary(now=None):
+    """When the next active offer starts or ends, or None"""
+    now = now or timezone.now()
+    boundaries = Offer.objects.filter(active=True).aggregate(
+        next_start=Min('start_date', filter=Q(start_date__gt=now)),
+        next_end=Min('end_date', filter=Q(end_date__gte=now))
+    )
+    upcoming = [boundary for boundary in boundaries.values() if boundary is not None]
+    return min(upcoming) if upcoming else None
@@ -0,0 +1,37 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast
+
+from .cache import invalidate_catalog
+from .models import Product
+
+
+def apply_review_change(product_id, count_delta, rating_delta):
+    """
+    Adjust a product's review count and rating in one UPDATE.
+
+    `rating_total` holds the sum of all ratings, so the new average is
+    computed in the database from the old values without re-reading the
+    product's reviews.
+    """
+    new_total = F('rating_total') + rating_delta
+    new_count = F('review_count') + count_delta
+    Product.objects.filter(pk=product_id).update(
+        rating_total=new_total,
+        review_count=new_count,
+        rating=Case(
+            When(review_count__gt=-count_delta, then=Cast(new_total, FloatField()) / new_count),
+            default=Value(0.0),
+            output_field=FloatField()
+        )
+    )
+    transaction.on_commit(invalidate_catalog)
+
+
+def average_rating(total, count):
+    """Average rating rounded the way Product.rating stores it"""
+    if not count:
+        return Decimal('0.00')
+    return (Decimal(total) / Decimal(count)).quantize(Decimal('0.01'))
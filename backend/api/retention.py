@@ -0,0 +1,234 @@
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import ProductView, ProductViewDaily
+
+VIEW_TABLE = ProductView._meta.db_table
+
+
+def day_bounds(day):
+    """Aware [start, end) datetimes covering a calendar day"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def summarize_day(day):
+    """
+    Write the ProductViewDaily rows for one day of raw views. Days that
+    already have a summary are left alone, so an interrupted run can be
+    resumed without double counting.
+    """
+    if ProductViewDaily.objects.filter(date=day).exists():
+        return 0
+    start, end = day_bounds(day)
+    rows = (
+        ProductView.objects.filter(viewed_at__gte=start, viewed_at__lt=end)
+        .order_by()
+        .values('product')
+        .annotate(
+            views=Count('id'),
+            unique_ips=Count('ip_address', distinct=True),
+            unique_users=Count('user', distinct=True)
+        )
+    )
+    summaries = [
+        ProductViewDaily(
+            product_id=row['product'],
+            date=day,
+            views=row['views'],
+            unique_ips=row['unique_ips'],
+            unique_users=row['unique_users']
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        ProductViewDaily.objects.bulk_create(summaries, batch_size=1000)
+    return len(summaries)
+
+
+def delete_views_before(start, end, batch_size):
+    """Delete raw views in [start, end) in batches of `batch_size` rows"""
+    deleted = 0
+    queryset = ProductView.objects.filter(viewed_at__gte=start, viewed_at__lt=end)
+    while True:
+        ids = list(queryset.order_by().values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            deleted += ProductView.objects.filter(id__in=ids).delete()[0]
+
+
+def rollup_views(days, batch_size=5000, log=None):
+    """
+    Summarize raw ProductView rows older than `days` days into
+    ProductViewDaily and delete them. On a partitioned Postgres table,
+    whole months past the cutoff are dropped as partitions instead.
+    Returns (days summarized, rows deleted, partitions dropped).
+    """
+    log = log or (lambda message: None)
+    cutoff_day = timezone.localdate() - timedelta(days=days)
+    cutoff, _ = day_bounds(cutoff_day)
+
+    old_days = list(
+        ProductView.objects.filter(viewed_at__lt=cutoff).dates('viewed_at', 'day')
+    )
+    summarized = deleted = dropped = 0
+    for day in old_days:
+        summarize_day(day)
+        summarized += 1
+
+    partitions = []
+    if is_partitioned():
+        ensure_future_partitions()
+        partitions = old_partitions(cutoff_day)
+    for name, start_day, end_day in partitions:
+        with connection.schema_editor() as schema_editor:
+            schema_editor.execute(
+                f'ALTER TABLE {VIEW_TABLE} DETACH PARTITION {name}'
+            )
+            schema_editor.execute(f'DROP TABLE {name}')
+        log(f'Dropped partition {name} ({start_day} to {end_day})')
+        dropped += 1
+
+    for day in old_days:
+        start, end = day_bounds(day)
+        count = delete_views_before(start, end, batch_size)
+        if count:
+            log(f'{day}: deleted {count} raw views')
+        deleted += count
+
+    return summarized, deleted, dropped
+
+
+# Postgres monthly range partitioning
+
+def partition_name(day):
+    return f'{VIEW_TABLE}_p{day:%Y%m}'
+
+
+def is_partitioned():
+    """Whether the view log is a natively partitioned Postgres table"""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = %s",
+            [VIEW_TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def monthly_partitions():
+    """(name, first day, first day of next month) for each month partition"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = %s",
+            [VIEW_TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = []
+    prefix = f'{VIEW_TABLE}_p'
+    for name in names:
+        suffix = name[len(prefix):]
+        if name.startswith(prefix) and suffix.isdigit() and len(suffix) == 6:
+            start_day = datetime.strptime(suffix, '%Y%m').date()
+            partitions.append((name, start_day, next_month(start_day)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def old_partitions(cutoff_day):
+    """Month partitions that end on or before the retention cutoff"""
+    return [p for p in monthly_partitions() if p[2] <= cutoff_day]
+
+
+def create_partitions(schema_editor, first_day, last_day):
+    """Create month partitions covering first_day..last_day, if missing"""
+    existing = {name for name, _, _ in monthly_partitions()}
+    day = month_start(first_day)
+    while day <= last_day:
+        name = partition_name(day)
+        if name not in existing:
+            start, _ = day_bounds(day)
+            end, _ = day_bounds(next_month(day))
+            schema_editor.execute(
+                f'CREATE TABLE {name} PARTITION OF {VIEW_TABLE} '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                [start, end]
+            )
+        day = next_month(day)
+
+
+def ensure_future_partitions(months_ahead=3):
+    """Keep month partitions created ahead of time so rows skip DEFAULT"""
+    today = timezone.localdate()
+    with connection.schema_editor() as schema_editor:
+        create_partitions(
+            schema_editor, today, today + timedelta(days=31 * months_ahead)
+        )
+
+
+def convert_to_partitioned(months_ahead=3):
+    """
+    Rebuild the view log as a table range-partitioned by month on
+    viewed_at, copying existing rows. The primary key becomes
+    (id, viewed_at) since Postgres requires the partition key in it.
+    """
+    today = timezone.localdate()
+    with transaction.atomic(), connection.schema_editor() as schema_editor:
+        execute = schema_editor.execute
+        execute(f'ALTER TABLE {VIEW_TABLE} RENAME TO {VIEW_TABLE}_old')
+        execute(f'ALTER INDEX {VIEW_TABLE}_pkey RENAME TO {VIEW_TABLE}_old_pkey')
+        # Free the Django-managed index names so the new table can reuse them
+        for index in ProductView._meta.indexes:
+            execute(f'DROP INDEX IF EXISTS {index.name}')
+        execute(
+            f'CREATE TABLE {VIEW_TABLE} ('
+            f'id bigint NOT NULL, '
+            f'ip_address inet NULL, '
+            f'viewed_at timestamp with time zone NOT NULL, '
+            f'product_id bigint NOT NULL REFERENCES api_product (id) DEFERRABLE INITIALLY DEFERRED, '
+            f'user_id bigint NULL REFERENCES api_user (id) DEFERRABLE INITIALLY DEFERRED, '
+            f'PRIMARY KEY (id, viewed_at)'
+            f') PARTITION BY RANGE (viewed_at)'
+        )
+        execute(f'CREATE SEQUENCE {VIEW_TABLE}_part_id_seq OWNED BY {VIEW_TABLE}.id')
+        execute(
+            f"ALTER TABLE {VIEW_TABLE} ALTER COLUMN id "
+            f"SET DEFAULT nextval('{VIEW_TABLE}_part_id_seq')"
+        )
+        execute(
+            f"SELECT setval('{VIEW_TABLE}_part_id_seq', "
+            f"COALESCE((SELECT MAX(id) FROM {VIEW_TABLE}_old), 0) + 1, false)"
+        )
+        for index in ProductView._meta.indexes:
+            columns = ', '.join(
+                ProductView._meta.get_field(field).column for field in index.fields
+            )
+            execute(f'CREATE INDEX {index.name} ON {VIEW_TABLE} ({columns})')
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT MIN(viewed_at) FROM {VIEW_TABLE}_old')
+            oldest = cursor.fetchone()[0]
+        first_day = timezone.localdate(oldest) if oldest else today
+        create_partitions(schema_editor, first_day, today + timedelta(days=31 * months_ahead))
+        execute(f'CREATE TABLE {VIEW_TABLE}_default PARTITION OF {VIEW_TABLE} DEFAULT')
+
+        execute(
+            f'INSERT INTO {VIEW_TABLE} (id, ip_address, viewed_at, product_id, user_id) '
+            f'SELECT id, ip_address, viewed_at, product_id, user_id FROM {VIEW_TABLE}_old'
+        )
+        execute(f'DROP TABLE {VIEW_TABLE}_old')
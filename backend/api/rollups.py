@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.utils import timezone
+
+from .models import DailySales, DailyProductSales, Order, OrderItem
+
+LINE_REVENUE = ExpressionWrapper(
+    F('price') * F('quantity'),
+    output_field=DecimalField(max_digits=15, decimal_places=2)
+)
+
+
+def apply_order_to_rollups(order, sign):
+    """
+    Add (sign=1) or remove (sign=-1) a delivered order's contribution to the
+    daily rollups for the order's date.
+    """
+    date = timezone.localdate(order.created_at)
+    items = OrderItem.objects.filter(order=order).values('product').annotate(
+        units=Sum('quantity'),
+        line_revenue=Sum(LINE_REVENUE)
+    )
+
+    with transaction.atomic():
+        DailySales.objects.get_or_create(date=date)
+        DailySales.objects.filter(date=date).update(
+            revenue=F('revenue') + sign * order.total,
+            order_count=F('order_count') + sign
+        )
+        for item in items:
+            DailyProductSales.objects.get_or_create(date=date, product_id=item['product'])
+            DailyProductSales.objects.filter(date=date, product_id=item['product']).update(
+                quantity=F('quantity') + sign * item['units'],
+                revenue=F('revenue') + sign * item['line_revenue']
+            )
+
+
+def order_status_changed(order, old_status):
+    """Keep the rollups in step when an order moves to or from delivered"""
+    delivered = Order.Status.DELIVERED
+    if old_status != delivered and order.status == delivered:
+        apply_order_to_rollups(order, 1)
+    elif old_status == delivered and order.status != delivered:
+        apply_order_to_rollups(order, -1)
@@ -0,0 +1,210 @@
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+FTS_TABLE = 'api_product_fts'
+SEARCH_FIELDS = ['name', 'description', 'category', 'material']
+
+# Postgres: a tsvector column kept current by a trigger, with a GIN index
+POSTGRES_FORWARD_SQL = [
+    "ALTER TABLE api_product ADD COLUMN search_vector tsvector",
+    """
+    CREATE FUNCTION api_product_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.category, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.material, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER api_product_search_vector_insert
+    BEFORE INSERT ON api_product
+    FOR EACH ROW EXECUTE FUNCTION api_product_search_vector_update()
+    """,
+    """
+    CREATE TRIGGER api_product_search_vector_update
+    BEFORE UPDATE OF name, description, category, material ON api_product
+    FOR EACH ROW
+    WHEN (OLD.name IS DISTINCT FROM NEW.name
+          OR OLD.description IS DISTINCT FROM NEW.description
+          OR OLD.category IS DISTINCT FROM NEW.category
+          OR OLD.material IS DISTINCT FROM NEW.material)
+    EXECUTE FUNCTION api_product_search_vector_update()
+    """,
+    # Fill the column for existing products
+    """
+    UPDATE api_product SET search_vector =
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(category, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(material, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    """,
+    "CREATE INDEX api_product_search_vector_gin ON api_product USING gin (search_vector)",
+]
+
+POSTGRES_REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS api_product_search_vector_update ON api_product",
+    "DROP TRIGGER IF EXISTS api_product_search_vector_insert ON api_product",
+    "DROP FUNCTION IF EXISTS api_product_search_vector_update()",
+    "ALTER TABLE api_product DROP COLUMN IF EXISTS search_vector",
+]
+
+# SQLite: an external-content FTS5 table synced by triggers. The update
+# trigger only fires for the indexed columns, so counter updates are free.
+SQLITE_FORWARD_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        name, description, category, material,
+        content='api_product', content_rowid='id',
+        tokenize='unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON api_product BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description, category, material)
+        VALUES (new.id, new.name, new.description, new.category, new.material);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON api_product BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, category, material)
+        VALUES ('delete', old.id, old.name, old.description, old.category, old.material);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_au
+    AFTER UPDATE OF name, description, category, material ON api_product BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, category, material)
+        VALUES ('delete', old.id, old.name, old.description, old.category, old.material);
+        INSERT INTO {FTS_TABLE}(rowid, name, description, category, material)
+        VALUES (new.id, new.name, new.description, new.category, new.material);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+SQLITE_TRIGGERS = [f'{FTS_TABLE}_ai', f'{FTS_TABLE}_ad', f'{FTS_TABLE}_au']
+
+
+def install_sqlite_search_index(schema_editor):
+    """
+    (Re)create the SQLite FTS table and its triggers if any are missing.
+
+    SQLite migrations that rebuild api_product drop its triggers, so this
+    also runs after every migrate and rebuilds the index when needed.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (%s)"
+            % ', '.join(['%s'] * (len(SQLITE_TRIGGERS) + 1)),
+            [FTS_TABLE] + SQLITE_TRIGGERS
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+    if len(existing) == len(SQLITE_TRIGGERS) + 1:
+        return
+    for statement in SQLITE_REVERSE_SQL + SQLITE_FORWARD_SQL:
+        schema_editor.execute(statement)
+
+
+def tokenize(term):
+    """Split a search term into word tokens"""
+    return re.findall(r'\w+', term.lower())
+
+
+def has_search_index():
+    """Whether the current database has the full-text index installed"""
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [FTS_TABLE]
+            )
+            return cursor.fetchone() is not None
+    return False
+
+
+def search_products(queryset, term):
+    """
+    Filter a product queryset by a full-text search term and annotate it
+    with `search_rank` (higher is better). Every word is prefix-matched.
+    Falls back to icontains filtering when no full-text index is available.
+    """
+    words = tokenize(term)
+    if not words:
+        return queryset
+
+    if not has_search_index():
+        for word in words:
+            query = Q()
+            for field in SEARCH_FIELDS:
+                query |= Q(**{f'{field}__icontains': word})
+            queryset = queryset.filter(query)
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        tsquery = ' & '.join(f'{word}:*' for word in words)
+        return queryset.annotate(
+            search_match=RawSQL(
+                "api_product.search_vector @@ to_tsquery('english', %s)",
+                [tsquery],
+                output_field=BooleanField()
+            ),
+            search_rank=RawSQL(
+                "ts_rank(api_product.search_vector, to_tsquery('english', %s))",
+                [tsquery],
+                output_field=FloatField()
+            )
+        ).filter(search_match=True)
+
+    match = ' '.join(f'"{word}"*' for word in words)
+    # Join the FTS table directly so MATCH runs once per query; bm25() is
+    # lower-is-better, negate it so both backends sort descending
+    return queryset.extra(
+        select={'search_rank': f'-bm25({FTS_TABLE}, 10.0, 1.0, 5.0, 5.0)'},
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = api_product.id', f'{FTS_TABLE} MATCH %s'],
+        params=[match]
+    )
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """
+    Search filter backed by the product full-text index. Results are
+    ordered by relevance unless the client asked for an explicit sort.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '')
+        if not tokenize(term):
+            return queryset
+
+        queryset = search_products(queryset, term)
+        explicit_sort = (
+            request.query_params.get('sort_by') or
+            request.query_params.get(api_settings.ORDERING_PARAM)
+        )
+        query = queryset.query
+        if not explicit_sort and (
+            'search_rank' in query.annotations or 'search_rank' in query.extra
+        ):
+            queryset = queryset.order_by('-search_rank', '-created_at')
+        return queryset
+
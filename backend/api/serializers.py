@@ -1,19 +1,53 @@
+from decimal import Decimal
+
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, When
 from .models import (
     Product, ProductImage, Offer, Order, OrderItem,
     Wishlist, Review, ProductLike, ProductView
 )
+from .bulk import sync_images
+from .exceptions import OutOfStock
+from .images import derivative_url, srcset
+from .media import model_url
+from .sqlite import retry_on_lock
 
 User = get_user_model()
 
 
+def absolute_url(context, url):
+    """Absolute URL for a media path when a request is available"""
+    request = context.get('request')
+    return request.build_absolute_uri(url) if request else url
+
+
+def image_srcsets(image, context):
+    """WebP and JPEG `srcset` values for an image, None until rendered"""
+    build_url = lambda url: absolute_url(context, url)
+    webp = srcset(image, 'webp', build_url)
+    if webp is None:
+        return None
+    return {'webp': webp, 'jpeg': srcset(image, 'jpeg', build_url)}
+
+
 class UserSerializer(serializers.ModelSerializer):
     """User serializer"""
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'role', 'avatar', 'phone', 'date_joined']
         read_only_fields = ['id', 'date_joined']
+    
+    def validate_email(self, value):
+        # Emails are unique regardless of case (see User.Meta.constraints)
+        users = User.objects.filter(email__iexact=value)
+        if self.instance is not None:
+            users = users.exclude(pk=self.instance.pk)
+        if value and users.exists():
+            raise serializers.ValidationError('A user with this email already exists')
+        return value
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -25,6 +59,11 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         model = User
         fields = ['username', 'email', 'password', 'password_confirm', 'first_name', 'last_name']
     
+    def validate_email(self, value):
+        if value and User.objects.filter(email__iexact=value).exists():
+            raise serializers.ValidationError('A user with this email already exists')
+        return value
+    
     def validate(self, data):
         if data['password'] != data['password_confirm']:
             raise serializers.ValidationError("Passwords don't match")
@@ -39,19 +78,20 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 class ProductImageSerializer(serializers.ModelSerializer):
     """Product image serializer"""
     url = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = ProductImage
-        fields = ['id', 'url', 'alt_text', 'order']
+        fields = ['id', 'url', 'srcset', 'alt_text', 'order']
         
     def get_url(self, obj):
         if obj.image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.image.url)
-            return obj.image.url
+            return absolute_url(self.context, obj.image.url)
         return obj.image_url
 
+    def get_srcset(self, obj):
+        return image_srcsets(obj, self.context)
+
 
 class OfferSerializer(serializers.ModelSerializer):
     """Offer serializer"""
@@ -63,106 +103,147 @@ class OfferSerializer(serializers.ModelSerializer):
 class ProductSerializer(serializers.ModelSerializer):
     """Product serializer"""
     images = ProductImageSerializer(many=True, read_only=True)
+    effective_price = serializers.DecimalField(
+        max_digits=15, decimal_places=2, source='current_price', read_only=True
+    )
     offer = serializers.SerializerMethodField()
+    model_3d_optimized = serializers.SerializerMethodField()
+    model_3d_preview = serializers.SerializerMethodField()
     
     class Meta:
         model = Product
         fields = [
-            'id', 'name', 'description', 'price', 'original_price',
-            'category', 'material', 'images', 'model_3d', 'availability',
-            'stock', 'likes', 'views', 'rating', 'review_count',
+            'id', 'sku', 'name', 'description', 'price', 'original_price',
+            'effective_price', 'category', 'material', 'images', 'model_3d',
+            'model_3d_optimized', 'model_3d_preview', 'availability', 'stock', 'likes', 'views', 'rating', 'review_count',
             'created_at', 'updated_at', 'offer'
         ]
-        read_only_fields = ['likes', 'views', 'rating', 'review_count', 'created_at', 'updated_at']
+        read_only_fields = [
+            'likes', 'views', 'rating', 'review_count', 'created_at', 'updated_at'
+        ]
     
     def get_offer(self, obj):
         """Get active offer for product"""
-        from django.utils import timezone
-        active_offers = obj.offers.filter(
-            active=True,
-            start_date__lte=timezone.now(),
-            end_date__gte=timezone.now()
-        ).first()
-        if active_offers:
-            return OfferSerializer(active_offers).data
+        offer = obj.current_offer
+        if offer:
+            return OfferSerializer(offer).data
         return None
 
+    def model_variant_url(self, obj, kind):
+        if obj.model_3d_status != Product.ModelStatus.READY:
+            return None
+        return absolute_url(self.context, model_url(obj.model_3d_variants[kind]))
+
+    def get_model_3d_optimized(self, obj):
+        """Compact copy of model_3d, once the optimize_models worker built it"""
+        return self.model_variant_url(obj, 'optimized')
+
+    def get_model_3d_preview(self, obj):
+        """Low-poly model to show while the full one loads"""
+        return self.model_variant_url(obj, 'preview')
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if data.get('model_3d'):
+            # Version the URL by content so the file can be cached as immutable
+            data['model_3d'] = absolute_url(self.context, model_url(instance.model_3d.name))
+        return data
+
+    def image_urls(self):
+        """Image URLs sent with the request, None if `images` wasn't sent"""
+        images = self.initial_data.get('images')
+        if not isinstance(images, list):
+            return None
+        return [url for url in images if isinstance(url, str) and url.startswith('http')]
+
     def create(self, validated_data):
-        images = self.initial_data.get('images', [])
-        product = super().create(validated_data)
-        
-        if isinstance(images, list):
-            for i, url in enumerate(images):
-                if isinstance(url, str) and url.startswith('http'):
-                    ProductImage.objects.create(product=product, image_url=url, order=i)
-            
+        urls = self.image_urls()
+        with transaction.atomic():
+            product = super().create(validated_data)
+            if urls:
+                sync_images({product.pk: urls})
         return product
 
     def update(self, instance, validated_data):
-        images = self.initial_data.get('images')
-        product = super().update(instance, validated_data)
-        
-        if images is not None and isinstance(images, list):
-            instance.images.all().delete()
-            for i, url in enumerate(images):
-                if isinstance(url, str) and url.startswith('http'):
-                    ProductImage.objects.create(product=product, image_url=url, order=i)
-                
+        urls = self.image_urls()
+        with transaction.atomic():
+            product = super().update(instance, validated_data)
+            if urls is not None:
+                # Matches existing rows by URL, so an unchanged list costs
+                # one query and kept images keep their ids
+                sync_images({product.pk: urls})
         return product
 
 
 class ProductListSerializer(serializers.ModelSerializer):
     """Lightweight product serializer for lists"""
     images = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
+    effective_price = serializers.DecimalField(
+        max_digits=15, decimal_places=2, source='current_price', read_only=True
+    )
     offer = serializers.SerializerMethodField()
     
     class Meta:
         model = Product
         fields = [
             'id', 'name', 'description', 'price', 'original_price',
-            'category', 'material', 'images', 'availability',
-            'stock', 'likes', 'views', 'rating', 'review_count',
+            'effective_price', 'category', 'material', 'images', 'srcset',
+            'availability', 'stock', 'likes', 'views', 'rating', 'review_count',
             'created_at', 'offer'
         ]
     
+    def first_image(self, obj):
+        if hasattr(obj, 'list_images'):
+            return obj.list_images[0] if obj.list_images else None
+        return obj.images.first()
+    
     def get_images(self, obj):
-        """Get first image URL"""
-        first_image = obj.images.first()
+        """Get first image URL, the card-sized copy once it's rendered"""
+        first_image = self.first_image(obj)
         if first_image:
             if first_image.image:
-                request = self.context.get('request')
-                if request:
-                    return [request.build_absolute_uri(first_image.image.url)]
-                return [first_image.image.url]
+                url = derivative_url(first_image, 'card') or first_image.image.url
+                return [absolute_url(self.context, url)]
             elif first_image.image_url:
                 return [first_image.image_url]
         return []
     
+    def get_srcset(self, obj):
+        """Responsive sources for the first image"""
+        first_image = self.first_image(obj)
+        return image_srcsets(first_image, self.context) if first_image else None
+    
     def get_offer(self, obj):
         """Get active offer for product"""
-        from django.utils import timezone
-        active_offers = obj.offers.filter(
-            active=True,
-            start_date__lte=timezone.now(),
-            end_date__gte=timezone.now()
-        ).first()
-        if active_offers:
+        active_offer = obj.current_offer
+        if active_offer:
             return {
-                'id': active_offers.id,
-                'title': active_offers.title,
-                'discount_percentage': active_offers.discount_percentage,
-                'end_date': active_offers.end_date
+                'id': active_offer.id,
+                'title': active_offer.title,
+                'discount_percentage': active_offer.discount_percentage,
+                'end_date': active_offer.end_date
             }
         return None
 
 
+class ReviewUserSerializer(serializers.ModelSerializer):
+    """Public reviewer details, without contact fields"""
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name', 'avatar']
+
+
+REVIEW_FIELDS = ['id', 'user', 'product', 'rating', 'comment', 'created_at', 'updated_at']
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     """Review serializer"""
-    user = UserSerializer(read_only=True)
+    user = ReviewUserSerializer(read_only=True)
     
     class Meta:
         model = Review
-        fields = ['id', 'user', 'product', 'rating', 'comment', 'created_at', 'updated_at']
+        fields = REVIEW_FIELDS
         read_only_fields = ['user', 'created_at', 'updated_at']
 
 
@@ -174,6 +255,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrderItem
         fields = ['id', 'product', 'product_id', 'quantity', 'price']
+        read_only_fields = ['price']
 
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -189,20 +271,75 @@ class OrderSerializer(serializers.ModelSerializer):
             'shipping_zip_code', 'shipping_country', 'payment_method',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['user', 'created_at', 'updated_at']
+        read_only_fields = ['user', 'total', 'created_at', 'updated_at']
+    
+    def validate_items(self, items):
+        if not items:
+            raise serializers.ValidationError('An order needs at least one item')
+        return items
     
+    @retry_on_lock
     def create(self, validated_data):
+        validated_data = dict(validated_data)
         items_data = validated_data.pop('items')
-        order = Order.objects.create(**validated_data)
         
+        # Merge repeated lines for the same product
+        quantities = {}
         for item_data in items_data:
-            product_id = item_data.pop('product_id')
-            product = Product.objects.get(id=product_id)
-            OrderItem.objects.create(
-                order=order,
-                product=product,
-                **item_data
+            product_id = item_data['product_id']
+            quantities[product_id] = quantities.get(product_id, 0) + item_data['quantity']
+        
+        with transaction.atomic():
+            # Lock every product row in one query so concurrent orders for
+            # the same products queue up instead of overselling
+            products = Product.objects.select_for_update().in_bulk(list(quantities))
+            
+            missing = [pid for pid in quantities if pid not in products]
+            if missing:
+                raise serializers.ValidationError(
+                    {'items': [f'Product {pid} does not exist' for pid in missing]}
+                )
+            
+            shortages = [
+                {
+                    'product_id': pid,
+                    'requested': quantity,
+                    'available': products[pid].stock if products[pid].availability else 0
+                }
+                for pid, quantity in quantities.items()
+                if not products[pid].availability or products[pid].stock < quantity
+            ]
+            if shortages:
+                raise OutOfStock(shortages)
+            
+            Product.objects.filter(pk__in=list(quantities)).update(
+                stock=Case(
+                    *[When(pk=pid, then=F('stock') - quantity)
+                      for pid, quantity in quantities.items()],
+                    output_field=IntegerField()
+                )
             )
+            # Backends without row locks (SQLite) can still race between the
+            # check and the update, so make sure nothing went negative
+            if Product.objects.filter(pk__in=list(quantities), stock__lt=0).exists():
+                raise OutOfStock()
+            
+            subtotal = sum(
+                products[pid].price * quantity for pid, quantity in quantities.items()
+            )
+            tax = (subtotal * settings.ORDER_TAX_RATE).quantize(Decimal('0.01'))
+            validated_data['total'] = subtotal + settings.ORDER_SHIPPING_FEE + tax
+            order = Order.objects.create(**validated_data)
+            
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    product=products[item_data['product_id']],
+                    quantity=item_data['quantity'],
+                    price=products[item_data['product_id']].price
+                )
+                for item_data in items_data
+            ])
         
         return order
 
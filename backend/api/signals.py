@@ -0,0 +1,194 @@
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models.signals import (
+    pre_save, post_save, pre_delete, post_delete, m2m_changed, post_migrate
+)
+from django.db.models import Q
+from django.dispatch import receiver
+from django.http import Http404
+
+from .authentication import forget_user_state
+from .cache import invalidate_catalog
+from .bulk import default_sku
+from .images import build_derivatives, needs_derivatives
+from .media import compress_model, model_name
+from .models import Product, ProductImage, Offer, Order, User
+from .pricing import discounted_price, refresh_effective_prices
+from .rollups import apply_order_to_rollups, order_status_changed
+from .search import install_sqlite_search_index
+from .sqlite import apply_pragmas
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+def catalog_changed(sender, **kwargs):
+    """Drop cached catalog responses when products, images or offers change"""
+    invalidate_catalog()
+
+
+@receiver(post_save, sender=ProductImage)
+def render_image_derivatives(sender, instance, **kwargs):
+    """Render resized copies of a newly uploaded image once it's committed"""
+    if not settings.IMAGE_DERIVATIVES_ON_UPLOAD or not needs_derivatives(instance):
+        return
+
+    def render():
+        try:
+            build_derivatives(instance)
+        except (OSError, ValueError):
+            # Unreadable upload: the original is served until the
+            # generate_image_derivatives command manages to render it
+            return
+        invalidate_catalog()
+
+    transaction.on_commit(render)
+
+
+@receiver(post_save, sender=Product)
+def compress_model_file(sender, instance, **kwargs):
+    """Write gzip/brotli variants of an uploaded 3D model once it's committed"""
+    if not instance.model_3d:
+        return
+    name = model_name(instance.model_3d.name)
+
+    def compress():
+        try:
+            compress_model(name)
+        except (OSError, Http404):
+            # Served uncompressed until the compress_models command runs
+            pass
+
+    transaction.on_commit(compress)
+
+
+@receiver(m2m_changed, sender=Offer.products.through)
+def offer_products_changed(sender, action, **kwargs):
+    """Drop cached catalog responses when offer membership changes"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_catalog()
+
+
+@receiver(pre_save, sender=Product)
+def set_effective_price(sender, instance, **kwargs):
+    """Keep effective_price in step with price edits"""
+    discount = instance.active_offer.discount_percentage if instance.active_offer_id else None
+    instance.effective_price = discounted_price(instance.price, discount)
+
+
+@receiver(pre_save, sender=Product)
+def queue_model_optimization(sender, instance, **kwargs):
+    """Queue a new or replaced 3D model for the optimize_models worker"""
+    name = instance.model_3d.name if instance.model_3d else ''
+    if name != instance.model_3d_variants.get('source', ''):
+        instance.model_3d_status = Product.ModelStatus.PENDING if name else ''
+        instance.model_3d_variants = {}
+
+
+@receiver(post_save, sender=Product)
+def assign_sku(sender, instance, **kwargs):
+    """Give products saved without a SKU the default one, based on their id"""
+    if not instance.sku:
+        instance.sku = default_sku(instance.pk)
+        Product.objects.filter(pk=instance.pk).update(sku=instance.sku)
+
+
+@receiver(pre_save, sender=Offer)
+def set_offer_live(sender, instance, **kwargs):
+    """Derive is_live from the window; sync_offers flips it at boundaries"""
+    instance.is_live = instance.is_current()
+
+
+@receiver(post_save, sender=Offer)
+def offer_saved(sender, instance, **kwargs):
+    """Reprice the offer's products after a discount or window change"""
+    refresh_effective_prices(Product.objects.filter(
+        Q(pk__in=instance.products.values('pk')) | Q(active_offer=instance)
+    ))
+
+
+@receiver(pre_delete, sender=Offer)
+def remember_offer_products(sender, instance, **kwargs):
+    instance._product_ids = list(instance.products.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Offer)
+def offer_deleted(sender, instance, **kwargs):
+    """Reprice products that lost the offer"""
+    refresh_effective_prices(
+        Product.objects.filter(pk__in=getattr(instance, '_product_ids', []))
+    )
+
+
+@receiver(m2m_changed, sender=Offer.products.through)
+def offer_products_repriced(sender, instance, action, reverse, pk_set, **kwargs):
+    """Reprice products added to or removed from an offer"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # product.offers.add(...): the instance is the product
+        products = Product.objects.filter(pk=instance.pk)
+    else:
+        products = Product.objects.filter(
+            Q(pk__in=pk_set or []) | Q(active_offer=instance)
+        )
+    refresh_effective_prices(products)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """Drop the cached auth state so token claims are re-checked"""
+    forget_user_state(instance.pk)
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_status(sender, instance, **kwargs):
+    """Remember the stored status so post_save can spot delivery changes"""
+    instance._previous_status = None
+    if instance.pk:
+        instance._previous_status = (
+            Order.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Order)
+def update_sales_rollups(sender, instance, **kwargs):
+    """Apply delivered/undelivered transitions to the daily sales rollups"""
+    order_status_changed(instance, getattr(instance, '_previous_status', None))
+
+
+@receiver(pre_delete, sender=Order)
+def remove_order_from_rollups(sender, instance, **kwargs):
+    """Take a delivered order out of the rollups before its items go away"""
+    if instance.status == Order.Status.DELIVERED:
+        apply_order_to_rollups(instance, -1)
+
+
+@receiver(post_migrate)
+def restore_search_index(sender, using='default', **kwargs):
+    """Reinstall SQLite full-text triggers dropped by table rebuilds"""
+    if sender.name != 'api':
+        return
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    # Only once the migration that creates the index is applied
+    applied = MigrationRecorder(connection).applied_migrations()
+    if ('api', '0005_product_search_index') not in applied:
+        return
+    with connection.schema_editor() as schema_editor:
+        install_sqlite_search_index(schema_editor)
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    """Apply the SQLite production-tuning PRAGMAs to every new connection"""
+    if connection.vendor == 'sqlite' and settings.SQLITE_TUNING:
+        with connection.cursor() as cursor:
+            apply_pragmas(cursor)
@@ -0,0 +1,56 @@
+import functools
+import random
+import sqlite3
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection
+
+
+def get_pragmas():
+    """PRAGMA statements for the SQLite production-tuning mode"""
+    return [
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        f'PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT)}',
+        f'PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}',
+        f'PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}',
+        'PRAGMA temp_store=MEMORY',
+    ]
+
+
+def apply_pragmas(cursor):
+    for pragma in get_pragmas():
+        cursor.execute(pragma)
+
+
+def is_lock_error(exc):
+    message = str(exc).lower()
+    return 'database is locked' in message or 'database is busy' in message
+
+
+def retry_on_lock(func):
+    """
+    Retry a write path when SQLite reports the database as locked.
+
+    busy_timeout covers most contention, but a deferred transaction that
+    read before writing can fail right away when another connection
+    committed first. The whole call is retried with jittered backoff, so
+    wrap the function that opens the transaction, not code inside one.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        attempts = getattr(settings, 'SQLITE_LOCK_RETRIES', 0)
+        for attempt in range(attempts + 1):
+            try:
+                return func(*args, **kwargs)
+            except (OperationalError, sqlite3.OperationalError) as exc:
+                if (
+                    attempt == attempts or
+                    connection.vendor != 'sqlite' or
+                    connection.in_atomic_block or
+                    not is_lock_error(exc)
+                ):
+                    raise
+                time.sleep(0.01 * (2 ** attempt) * (1 + random.random()))
+    return wrapper
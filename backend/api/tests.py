@@ -0,0 +1,241 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import DailySales, Offer, Order, Product, ProductImage, ProductLike, ProductView, User
+from .tracking import view_buffer
+
+# Every request reaches the view, so query counts don't depend on what an
+# earlier request left in the catalog cache
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+def create_products(count, offer=None):
+    products = []
+    for index in range(count):
+        product = Product.objects.create(
+            name=f'Ring {index}', description='Gold ring', price=100 + index,
+            category='rings', material='gold', stock=5
+        )
+        ProductImage.objects.create(product=product, image_url=f'https://img.example.com/{index}-2.jpg', order=2)
+        ProductImage.objects.create(product=product, image_url=f'https://img.example.com/{index}-1.jpg', order=1)
+        if offer is not None:
+            offer.products.add(product)
+        products.append(product)
+    return products
+
+
+@override_settings(CACHES=NO_CACHE)
+class ProductListQueryTests(TestCase):
+    """The product list costs the same number of queries for any page size"""
+
+    def setUp(self):
+        self.client = APIClient()
+        now = timezone.now()
+        self.offer = Offer.objects.create(
+            title='Sale', description='Sale', discount_percentage=10,
+            start_date=now - timedelta(days=1), end_date=now + timedelta(days=1)
+        )
+
+    def test_query_count_is_constant(self):
+        create_products(3, self.offer)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/products/')
+        self.assertEqual(len(response.data['results']), 3)
+
+        create_products(9, self.offer)
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get('/api/v1/products/')
+        self.assertEqual(len(response.data['results']), 12)
+
+    def test_first_image_and_offer(self):
+        create_products(2, self.offer)
+        item = self.client.get('/api/v1/products/').data['results'][0]
+        self.assertEqual(item['images'], ['https://img.example.com/1-1.jpg'])
+        self.assertEqual(item['offer']['id'], self.offer.id)
+
+
+@override_settings(CACHES=NO_CACHE)
+class ConcurrentCounterTests(TransactionTestCase):
+    """Likes and views from parallel requests are all counted"""
+    THREADS = 8
+
+    def setUp(self):
+        self.product = create_products(1)[0]
+        self.users = [
+            User.objects.create_user(f'shopper{index}', f'shopper{index}@example.com')
+            for index in range(120)
+        ]
+
+    def run_parallel(self, requests):
+        def send(request):
+            method, path, user = request
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                return getattr(client, method)(path).status_code
+            finally:
+                # Each worker thread opened its own connection
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=self.THREADS) as pool:
+            return list(pool.map(send, requests))
+
+    @override_settings(VIEW_BUFFER_ENABLED=False)
+    def test_parallel_likes_and_views(self):
+        like = f'/api/v1/products/{self.product.pk}/like/'
+        view = f'/api/v1/products/{self.product.pk}/view/'
+        # Users send one to four like requests each, so the ones with an odd
+        # count end up liking whatever order their toggles run in: 300 toggles
+        # leave 60 likes. Each of the 300 views is written as it happens
+        requests = [
+            ('post', like, user)
+            for round_ in range(4)
+            for index, user in enumerate(self.users)
+            if index % 4 >= round_
+        ]
+        requests += [('post', view, self.users[index % 120]) for index in range(300)]
+
+        statuses = self.run_parallel(requests)
+
+        self.assertEqual(len(requests), 600)
+        self.assertEqual(set(statuses), {200})
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.likes, 60)
+        self.assertEqual(ProductLike.objects.filter(product=self.product).count(), 60)
+        self.assertEqual(self.product.views, 300)
+        self.assertEqual(ProductView.objects.filter(product=self.product).count(), 300)
+
+    @override_settings(VIEW_BUFFER_ENABLED=True)
+    def test_parallel_buffered_views(self):
+        view = f'/api/v1/products/{self.product.pk}/view/'
+        view_buffer.flush()
+
+        statuses = self.run_parallel([('post', view, user) for user in self.users])
+        view_buffer.flush()
+
+        self.assertEqual(set(statuses), {200})
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.views, 120)
+        self.assertEqual(ProductView.objects.filter(product=self.product).count(), 120)
+
+
+@override_settings(CACHES=NO_CACHE)
+class ProductImageSyncTests(TestCase):
+    """Saving a product's image URLs only writes the rows that changed"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create_user('manager', 'manager@example.com', role='manager')
+        )
+
+    def urls(self, count):
+        return [f'https://img.example.com/ring-{index}.jpg' for index in range(count)]
+
+    def put_images(self, product, urls):
+        response = self.client.put(f'/api/v1/products/{product.pk}/', {
+            'name': product.name, 'description': product.description,
+            'price': str(product.price), 'category': product.category,
+            'material': product.material, 'stock': product.stock, 'images': urls,
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def image_ids(self, product):
+        return list(product.images.order_by('order').values_list('image_url', 'id'))
+
+    def test_unchanged_list_is_constant_and_keeps_ids(self):
+        query_counts = []
+        for count in (3, 12):
+            product = create_products(1)[0]
+            product.images.all().delete()
+            self.put_images(product, self.urls(count))
+            ids = self.image_ids(product)
+
+            with CaptureQueriesContext(connection) as queries:
+                self.put_images(product, self.urls(count))
+            query_counts.append(len(queries))
+            self.assertEqual(self.image_ids(product), ids)
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_reordered_list_keeps_ids(self):
+        product = create_products(1)[0]
+        product.images.all().delete()
+        self.put_images(product, self.urls(6))
+        ids = dict(self.image_ids(product))
+        reordered = self.urls(6)[::-1]
+
+        with CaptureQueriesContext(connection) as unchanged:
+            self.put_images(product, self.urls(6))
+        # Moving images costs one UPDATE on top of an unchanged save
+        with self.assertNumQueries(len(unchanged) + 1):
+            self.put_images(product, reordered)
+
+        self.assertEqual(self.image_ids(product), [(url, ids[url]) for url in reordered])
+
+
+@override_settings(CACHES=NO_CACHE)
+class OrderStockTests(TestCase):
+    """Cancelling or deleting an order gives its stock back exactly once"""
+
+    def setUp(self):
+        self.product = create_products(1)[0]
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create_user('staff', 'staff@example.com', role='staff')
+        )
+
+    def place_order(self, quantity):
+        response = self.client.post('/api/v1/orders/', {
+            'items': [{'product_id': self.product.pk, 'quantity': quantity}],
+            'shipping_street': '1 Main St', 'shipping_city': 'Town',
+            'shipping_state': 'State', 'shipping_zip_code': '00000',
+            'shipping_country': 'Country', 'payment_method': 'card',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data['id']
+
+    def set_status(self, order_id, new_status):
+        return self.client.patch(f'/api/v1/orders/{order_id}/update_status/', {'status': new_status})
+
+    def stock(self):
+        self.product.refresh_from_db()
+        return self.product.stock
+
+    def test_cancel_restores_stock_once(self):
+        order_id = self.place_order(3)
+        self.assertEqual(self.stock(), 2)
+
+        self.assertEqual(self.set_status(order_id, 'cancelled').status_code, 200)
+        self.assertEqual(self.stock(), 5)
+        self.assertEqual(self.set_status(order_id, 'cancelled').status_code, 200)
+        self.assertEqual(self.stock(), 5)
+        self.assertEqual(self.set_status(order_id, 'pending').status_code, 400)
+        self.assertEqual(self.stock(), 5)
+
+    def test_delete_restores_stock_unless_cancelled(self):
+        order_id = self.place_order(2)
+        self.assertEqual(self.client.delete(f'/api/v1/orders/{order_id}/').status_code, 204)
+        self.assertEqual(self.stock(), 5)
+
+        order_id = self.place_order(4)
+        self.set_status(order_id, 'cancelled')
+        self.assertEqual(self.client.delete(f'/api/v1/orders/{order_id}/').status_code, 204)
+        self.assertEqual(self.stock(), 5)
+        self.assertFalse(Order.objects.exists())
+
+    def test_cancelling_delivered_order_leaves_rollups(self):
+        order_id = self.place_order(1)
+        self.set_status(order_id, 'delivered')
+        self.assertEqual(DailySales.objects.get().order_count, 1)
+
+        self.set_status(order_id, 'cancelled')
+        self.assertEqual(DailySales.objects.get().order_count, 0)
+        self.assertEqual(self.client.delete(f'/api/v1/orders/{order_id}/').status_code, 204)
+        self.assertEqual(DailySales.objects.get().order_count, 0)
+        self.assertEqual(self.stock(), 5)
@@ -0,0 +1,112 @@
+import atexit
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Product, ProductView
+from .sqlite import retry_on_lock
+
+
+class ViewBuffer:
+    """
+    In-process buffer for product view events.
+
+    Views are accumulated in memory and written in one batch: a single
+    bulk_create of ProductView rows plus one aggregated `views` update per
+    product. A flush happens when the buffer reaches `max_size` events or
+    when `flush_interval` seconds have passed since the first buffered event.
+    """
+
+    def __init__(self, max_size=500, flush_interval=5.0):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._events = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def __len__(self):
+        return len(self._events)
+
+    def add(self, product_id, user_id=None, ip_address=None):
+        """Buffer a view event, flushing if the size threshold is reached"""
+        event = ProductView(
+            product_id=product_id,
+            user_id=user_id,
+            ip_address=ip_address,
+            viewed_at=timezone.now()
+        )
+        with self._lock:
+            self._events.append(event)
+            full = len(self._events) >= self.max_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(
+                    self.flush_interval, self._flush_from_timer
+                )
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered events to the database, returns the count"""
+        with self._lock:
+            events, self._events = self._events, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not events:
+            return 0
+
+        return write_views(events)
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # The timer thread gets its own connections, don't leak them
+            connections.close_all()
+
+
+@retry_on_lock
+def write_views(events):
+    """Insert view events and bump each product's counter once"""
+    counts = Counter(event.product_id for event in events)
+    existing = set(
+        Product.objects.filter(pk__in=counts).values_list('pk', flat=True)
+    )
+    events = [event for event in events if event.product_id in existing]
+
+    with transaction.atomic():
+        ProductView.objects.bulk_create(events)
+        for product_id, count in counts.items():
+            if product_id in existing:
+                Product.objects.filter(pk=product_id).update(
+                    views=F('views') + count
+                )
+    return len(events)
+
+
+view_buffer = ViewBuffer(
+    max_size=getattr(settings, 'VIEW_BUFFER_SIZE', 500),
+    flush_interval=getattr(settings, 'VIEW_BUFFER_FLUSH_INTERVAL', 5.0)
+)
+atexit.register(view_buffer.flush)
+
+
+def track_view(product, user=None, ip_address=None):
+    """Record a product view, buffered unless VIEW_BUFFER_ENABLED is off"""
+    if not getattr(settings, 'VIEW_BUFFER_ENABLED', True):
+        write_views([
+            ProductView(product_id=product.pk, user=user, ip_address=ip_address)
+        ])
+        return
+
+    view_buffer.add(
+        product.pk,
+        user_id=user.pk if user else None,
+        ip_address=ip_address
+    )
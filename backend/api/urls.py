@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
@@ -21,3 +22,22 @@ urlpatterns = [
     path('auth/login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 ]
+
+if settings.ASYNC_CATALOG_VIEWS:
+    # Async catalog reads in worker threads (for ASGI deployments)
+    from .async_views import async_active_offers, async_product_detail, async_product_list
+
+    urlpatterns = [
+        path('products/', async_product_list, name='product-list'),
+        path('products/<int:pk>/', async_product_detail, name='product-detail'),
+        path('offers/active/', async_active_offers, name='offer-active'),
+    ] + urlpatterns
+
+if settings.ASYNC_AUTH_VIEWS:
+    # Run password hashing in a bounded thread pool (for ASGI deployments)
+    from .async_views import async_login, async_register
+
+    urlpatterns = [
+        path('auth/login/', async_login, name='token_obtain_pair'),
+        path('users/register/', async_register, name='user-register'),
+    ] + urlpatterns
@@ -1,28 +1,86 @@
+import io
+from datetime import datetime, time, timedelta
+from time import perf_counter
+
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, AllowAny
-from django.db.models import Q, Count, Sum, Avg
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.db.models import (
+    Q, Count, Sum, F, Prefetch, DateField, DecimalField, ExpressionWrapper,
+    Case, When, IntegerField
+)
+from django.db.models.functions import Trunc
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from .models import (
     Product, ProductImage, Offer, Order, OrderItem,
-    Wishlist, Review, ProductLike, ProductView, User
+    Wishlist, Review, ProductLike, ProductView, ProductViewDaily, User,
+    DailySales, DailyProductSales
 )
 from .serializers import (
     ProductSerializer, ProductListSerializer, OfferSerializer,
-    OrderSerializer, WishlistSerializer, ReviewSerializer,
-    UserSerializer, UserRegistrationSerializer
+    OrderSerializer, WishlistSerializer, ReviewSerializer, ReviewUserSerializer,
+    UserSerializer, UserRegistrationSerializer, REVIEW_FIELDS
 )
 from .permissions import IsAdminOrManager, IsAdminOrStaff
+from .tracking import track_view
+from .cache import cached_response
+from .search import ProductSearchFilter
+from .pagination import OptionalKeysetPagination
+from .ratings import apply_review_change, average_rating
+from .pricing import live_offers, window_q
+from .rollups import apply_order_to_rollups
+from .db_routers import ReplicaReadMixin
+from .sqlite import retry_on_lock
+from .metrics import login_rates, record_login
+from .bulk import FORMATS, export_rows, format_for, import_products, read_rows, render_rows
+
+
+@retry_on_lock
+def toggle_like(user, product):
+    """Like or unlike a product, returns True when the product is now liked"""
+    # Counter updates are done in the database with F() expressions so
+    # concurrent workers don't lose increments, and only touch `likes`.
+    # The transaction opens with a write: on SQLite, one that read first
+    # can't wait for the write lock and fails as soon as another commits
+    with transaction.atomic():
+        deleted, _ = ProductLike.objects.filter(user=user, product=product).delete()
+        if deleted:
+            Product.objects.filter(pk=product.pk, likes__gt=0).update(
+                likes=F('likes') - 1
+            )
+            return False
+        
+        ProductLike.objects.create(user=user, product=product)
+        Product.objects.filter(pk=product.pk).update(likes=F('likes') + 1)
+        return True
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+def list_prefetches():
+    """
+    Prefetch the first image so the list serializer doesn't issue a query
+    per product
+    """
+    return [
+        Prefetch(
+            'images',
+            queryset=ProductImage.objects.order_by('order', 'id')[:1],
+            to_attr='list_images'
+        ),
+    ]
+
+
+class ProductViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """Product viewset with filtering and search"""
     queryset = Product.objects.all()
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['name', 'description', 'category', 'material']
-    ordering_fields = ['price', 'created_at', 'likes', 'rating']
+    filter_backends = [ProductSearchFilter, filters.OrderingFilter]
+    pagination_class = OptionalKeysetPagination
+    ordering_fields = ['price', 'effective_price', 'created_at', 'likes', 'rating']
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -30,7 +88,11 @@ class ProductViewSet(viewsets.ModelViewSet):
         return ProductSerializer
     
     def get_queryset(self):
-        queryset = Product.objects.all()
+        # The live offer is denormalized onto the product (see api.pricing)
+        queryset = Product.objects.select_related('active_offer')
+        
+        if self.action == 'list':
+            queryset = queryset.prefetch_related(*list_prefetches())
         
         # Filter by category
         category = self.request.query_params.getlist('category')
@@ -42,13 +104,13 @@ class ProductViewSet(viewsets.ModelViewSet):
         if material:
             queryset = queryset.filter(material__in=material)
         
-        # Filter by price range
+        # Filter by price range, on the price customers pay after discounts
         min_price = self.request.query_params.get('min_price')
         max_price = self.request.query_params.get('max_price')
         if min_price:
-            queryset = queryset.filter(price__gte=min_price)
+            queryset = queryset.filter(effective_price__gte=min_price)
         if max_price:
-            queryset = queryset.filter(price__lte=max_price)
+            queryset = queryset.filter(effective_price__lte=max_price)
         
         # Filter by availability
         in_stock = self.request.query_params.get('in_stock')
@@ -58,44 +120,84 @@ class ProductViewSet(viewsets.ModelViewSet):
         # Filter by offers
         on_offer = self.request.query_params.get('on_offer')
         if on_offer == 'true':
-            queryset = queryset.filter(
-                offers__active=True,
-                offers__start_date__lte=timezone.now(),
-                offers__end_date__gte=timezone.now()
-            ).distinct()
+            # The stored offer may have ended since sync_offers last ran
+            queryset = queryset.filter(window_q(timezone.now(), prefix='active_offer__'))
         
         # Sort by
         sort_by = self.request.query_params.get('sort_by')
         if sort_by == 'price_asc':
-            queryset = queryset.order_by('price')
+            queryset = queryset.order_by('effective_price', 'id')
         elif sort_by == 'price_desc':
-            queryset = queryset.order_by('-price')
+            queryset = queryset.order_by('-effective_price', '-id')
         elif sort_by == 'popularity':
-            queryset = queryset.order_by('-likes', '-views')
+            queryset = queryset.order_by('-likes', '-views', '-id')
         elif sort_by == 'newest':
-            queryset = queryset.order_by('-created_at')
+            queryset = queryset.order_by('-created_at', '-id')
         elif sort_by == 'rating':
-            queryset = queryset.order_by('-rating')
+            queryset = queryset.order_by('-rating', '-id')
         
         return queryset
     
+    def list(self, request, *args, **kwargs):
+        return cached_response(
+            request, 'products:list',
+            lambda: super(ProductViewSet, self).list(request, *args, **kwargs)
+        )
+    
+    def retrieve(self, request, *args, **kwargs):
+        return cached_response(
+            request, f"products:{kwargs.get('pk')}",
+            lambda: super(ProductViewSet, self).retrieve(request, *args, **kwargs)
+        )
+    
+    @action(
+        detail=False, methods=['post'], url_path='import',
+        permission_classes=[IsAdminOrManager], parser_classes=[MultiPartParser]
+    )
+    def bulk_import(self, request):
+        """Upsert products by SKU from an uploaded CSV or JSONL file"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {'error': 'Upload the file as `file`'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        file_format = request.data.get('file_format') or format_for(upload.name)
+        if file_format not in FORMATS:
+            return Response(
+                {'error': f"file_format must be one of {', '.join(FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        result = import_products(read_rows(stream, file_format))
+        return Response(result.as_dict())
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminOrManager])
+    def export(self, request):
+        """Stream every product as CSV or JSONL"""
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in FORMATS:
+            return Response(
+                {'error': f"file_format must be one of {', '.join(FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        response = StreamingHttpResponse(
+            render_rows(export_rows(), file_format),
+            content_type='text/csv' if file_format == 'csv' else 'application/x-ndjson'
+        )
+        response['Content-Disposition'] = f'attachment; filename="products.{file_format}"'
+        return response
+    
     @action(detail=True, methods=['post'])
     def like(self, request, pk=None):
         """Like a product"""
         product = self.get_object()
         user = request.user
         
-        like, created = ProductLike.objects.get_or_create(user=user, product=product)
-        
-        if not created:
-            like.delete()
-            product.likes = max(0, product.likes - 1)
-            product.save()
-            return Response({'message': 'Product unliked'})
-        else:
-            product.likes += 1
-            product.save()
-            return Response({'message': 'Product liked'})
+        liked = toggle_like(user, product)
+        return Response({'message': 'Product liked' if liked else 'Product unliked'})
     
     @action(detail=True, methods=['post'])
     def view(self, request, pk=None):
@@ -104,20 +206,14 @@ class ProductViewSet(viewsets.ModelViewSet):
         user = request.user if request.user.is_authenticated else None
         ip_address = request.META.get('REMOTE_ADDR')
         
-        ProductView.objects.create(
-            product=product,
-            user=user,
-            ip_address=ip_address
-        )
-        
-        product.views += 1
-        product.save()
+        track_view(product, user=user, ip_address=ip_address)
         
         return Response({'message': 'View tracked'})
 
 
-class OfferViewSet(viewsets.ModelViewSet):
+class OfferViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """Offer viewset"""
+    replica_actions = ('list', 'retrieve', 'active')
     queryset = Offer.objects.all()
     serializer_class = OfferSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -130,29 +226,71 @@ class OfferViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def active(self, request):
         """Get active offers"""
-        active_offers = Offer.objects.filter(
-            active=True,
-            start_date__lte=timezone.now(),
-            end_date__gte=timezone.now()
+        def build():
+            active_offers = live_offers().prefetch_related('products')
+            serializer = self.get_serializer(active_offers, many=True)
+            return Response(serializer.data)
+        
+        return cached_response(request, 'offers:active', build)
+
+
+@retry_on_lock
+def cancel_order(order):
+    """Mark an order cancelled and put its items back in stock, once"""
+    with transaction.atomic():
+        previous = Order.objects.filter(pk=order.pk).values_list('status', flat=True).first()
+        if previous in (None, Order.Status.CANCELLED):
+            return False
+        # Only the request that moves the order off its current status gets
+        # to restock, so concurrent cancels can't both do it, even without
+        # row locks. The update skips save(), so the rollups are handled here
+        claimed = Order.objects.filter(pk=order.pk, status=previous).update(
+            status=Order.Status.CANCELLED, updated_at=timezone.now()
         )
-        serializer = self.get_serializer(active_offers, many=True)
-        return Response(serializer.data)
+        if not claimed:
+            return False
+        
+        quantities = dict(
+            OrderItem.objects.filter(order_id=order.pk)
+            .values('product_id').annotate(quantity=Sum('quantity'))
+            .values_list('product_id', 'quantity')
+        )
+        if quantities:
+            Product.objects.filter(pk__in=list(quantities)).update(
+                stock=Case(
+                    *[When(pk=pid, then=F('stock') + quantity)
+                      for pid, quantity in quantities.items()],
+                    output_field=IntegerField()
+                )
+            )
+        if previous == Order.Status.DELIVERED:
+            apply_order_to_rollups(order, -1)
+    order.status = Order.Status.CANCELLED
+    return True
 
 
 class OrderViewSet(viewsets.ModelViewSet):
     """Order viewset"""
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OptionalKeysetPagination
     
     def get_queryset(self):
         user = self.request.user
         if user.role in ['admin', 'manager', 'staff']:
             return Order.objects.all()
-        return Order.objects.filter(user=user)
+        return Order.objects.filter(user_id=user.pk)
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
     
+    @retry_on_lock
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            # Deleting an order that still holds stock gives it back first
+            cancel_order(instance)
+            instance.delete()
+    
     @action(detail=True, methods=['patch'])
     def update_status(self, request, pk=None):
         """Update order status (staff only)"""
@@ -166,8 +304,18 @@ class OrderViewSet(viewsets.ModelViewSet):
         new_status = request.data.get('status')
         
         if new_status in dict(Order.Status.choices):
-            order.status = new_status
-            order.save()
+            if order.status == Order.Status.CANCELLED and new_status != order.status:
+                # Its stock has already gone back on sale
+                return Response(
+                    {'error': 'Cancelled orders cannot be reopened'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if new_status == Order.Status.CANCELLED:
+                cancel_order(order)
+                order.refresh_from_db()
+            else:
+                order.status = new_status
+                order.save()
             serializer = self.get_serializer(order)
             return Response(serializer.data)
         
@@ -183,7 +331,7 @@ class WishlistViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Wishlist.objects.filter(user=self.request.user)
+        return Wishlist.objects.filter(user_id=self.request.user.pk)
     
     def create(self, request):
         product_id = request.data.get('product_id')
@@ -216,26 +364,73 @@ class WishlistViewSet(viewsets.ModelViewSet):
         )
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """Review viewset"""
+    replica_actions = ('list', 'histogram')
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = OptionalKeysetPagination
     
     def get_queryset(self):
+        # Reviewers come from the same query, with only the columns
+        # ReviewUserSerializer renders
+        queryset = Review.objects.select_related('user').only(
+            *REVIEW_FIELDS, *(f'user__{field}' for field in ReviewUserSerializer.Meta.fields)
+        )
         product_id = self.request.query_params.get('product_id')
         if product_id:
-            return Review.objects.filter(product_id=product_id)
-        return Review.objects.all()
+            return queryset.filter(product_id=product_id)
+        return queryset
     
-    def perform_create(self, serializer):
-        review = serializer.save(user=self.request.user)
+    @action(detail=False, methods=['get'])
+    def histogram(self, request):
+        """Review count per star rating for a product, in one grouped query"""
+        product_id = request.query_params.get('product_id', '')
+        if not product_id.isdigit():
+            return Response(
+                {'error': 'product_id is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        def build():
+            counts = dict(
+                Review.objects.filter(product_id=product_id)
+                .values_list('rating').annotate(count=Count('id')).order_by()
+            )
+            total = sum(counts.values())
+            return Response({
+                'product_id': int(product_id),
+                'total': total,
+                'average': average_rating(
+                    sum(rating * count for rating, count in counts.items()), total
+                ),
+                'counts': {str(rating): counts.get(rating, 0) for rating in range(1, 6)},
+            })
         
-        # Update product rating
-        product = review.product
-        reviews = product.reviews.all()
-        product.rating = reviews.aggregate(Avg('rating'))['rating__avg'] or 0
-        product.review_count = reviews.count()
-        product.save()
+        return cached_response(request, 'reviews:histogram', build)
+    
+    # Product rating is maintained incrementally from the old and new review
+    # values; `recompute_ratings` repairs any drift in bulk
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            review = serializer.save(user=self.request.user)
+            apply_review_change(review.product_id, 1, review.rating)
+    
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            old = Review.objects.select_for_update().get(pk=serializer.instance.pk)
+            review = serializer.save()
+            if review.product_id != old.product_id:
+                apply_review_change(old.product_id, -1, -old.rating)
+                apply_review_change(review.product_id, 1, review.rating)
+            elif review.rating != old.rating:
+                apply_review_change(review.product_id, 0, review.rating - old.rating)
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            old = Review.objects.select_for_update().get(pk=instance.pk)
+            instance.delete()
+            apply_review_change(old.product_id, -1, -old.rating)
 
 
 from rest_framework_simplejwt.views import TokenObtainPairView
@@ -243,6 +438,14 @@ from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        # Claims read by StatelessJWTAuthentication
+        token['role'] = user.role
+        token['is_active'] = user.is_active
+        return token
+
     def validate(self, attrs):
         data = super().validate(attrs)
         data['user'] = UserSerializer(self.user).data
@@ -255,25 +458,24 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     def post(self, request, *args, **kwargs):
         # Create a mutable copy of the request data
         data = request.data.copy() if hasattr(request.data, 'copy') else dict(request.data)
-            
+
+        # EmailOrUsernameBackend resolves either one, so an email is passed
+        # through as the username instead of being looked up here
         if 'email' in data and 'username' not in data:
-            email = data.get('email')
-            try:
-                user = User.objects.get(email=email)
-                data['username'] = user.username
-            except User.DoesNotExist:
-                # Let the serializer handle the error
-                pass
-            except User.MultipleObjectsReturned:
-                # Multiple users with same email - let serializer handle it
-                pass
-        
+            data['username'] = data.get('email')
+
         serializer = self.get_serializer(data=data)
 
+        started = perf_counter()
         try:
             serializer.is_valid(raise_exception=True)
         except TokenError as e:
+            record_login('failure', perf_counter() - started)
             raise InvalidToken(e.args[0])
+        except Exception:
+            record_login('failure', perf_counter() - started)
+            raise
+        record_login('success', perf_counter() - started)
 
         return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
@@ -311,33 +513,53 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def parse_date_param(value):
+    """Parse a YYYY-MM-DD (or ISO datetime) query param into a date"""
+    if not value:
+        return None
+    parsed = parse_date(value) or parse_datetime(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed.date() if isinstance(parsed, datetime) else parsed
+
+
+SERIES_INTERVALS = ('day', 'week', 'month')
+
+
 class AnalyticsViewSet(viewsets.ViewSet):
     """Analytics viewset for sales and product metrics"""
     permission_classes = [IsAdminOrStaff]
     
     @action(detail=False, methods=['get'])
     def sales(self, request):
-        """Get sales analytics"""
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-        
-        orders = Order.objects.filter(status='delivered')
+        """Get sales analytics from the daily rollups"""
+        try:
+            start_date = parse_date_param(request.query_params.get('start_date'))
+            end_date = parse_date_param(request.query_params.get('end_date'))
+        except ValueError:
+            return Response(
+                {'error': 'Invalid date, use YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
+        days = DailySales.objects.all()
+        product_days = DailyProductSales.objects.all()
         if start_date:
-            orders = orders.filter(created_at__gte=start_date)
+            days = days.filter(date__gte=start_date)
+            product_days = product_days.filter(date__gte=start_date)
         if end_date:
-            orders = orders.filter(created_at__lte=end_date)
+            days = days.filter(date__lte=end_date)
+            product_days = product_days.filter(date__lte=end_date)
         
-        total_revenue = orders.aggregate(Sum('total'))['total__sum'] or 0
-        total_orders = orders.count()
+        totals = days.aggregate(revenue=Sum('revenue'), orders=Sum('order_count'))
+        total_revenue = totals['revenue'] or 0
+        total_orders = totals['orders'] or 0
         avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
         
         # Top products
-        top_products = OrderItem.objects.filter(
-            order__in=orders
-        ).values('product__name').annotate(
+        top_products = product_days.values('product__name').annotate(
             total_sold=Sum('quantity'),
-            revenue=Sum('price')
+            revenue=Sum('revenue')
         ).order_by('-revenue')[:10]
         
         return Response({
@@ -349,32 +571,118 @@ class AnalyticsViewSet(viewsets.ViewSet):
     
     @action(detail=True, methods=['get'])
     def product(self, request, pk=None):
-        """Get product analytics"""
+        """Get product analytics, with an optional time series"""
+        interval = request.query_params.get('interval')
+        if interval and interval not in SERIES_INTERVALS:
+            return Response(
+                {'error': 'interval must be one of day, week, month'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Product row and delivered-order totals in one query
+        delivered = Q(orderitem__order__status=Order.Status.DELIVERED)
         try:
-            product = Product.objects.get(pk=pk)
-        except Product.DoesNotExist:
+            product = Product.objects.annotate(
+                total_sold=Sum('orderitem__quantity', filter=delivered),
+                revenue=Sum(
+                    ExpressionWrapper(
+                        F('orderitem__price') * F('orderitem__quantity'),
+                        output_field=DecimalField(max_digits=15, decimal_places=2)
+                    ),
+                    filter=delivered
+                )
+            ).get(pk=pk)
+        except (Product.DoesNotExist, ValueError):
             return Response(
                 {'error': 'Product not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        total_sold = OrderItem.objects.filter(
-            product=product,
-            order__status='delivered'
-        ).aggregate(Sum('quantity'))['quantity__sum'] or 0
-        
-        revenue = OrderItem.objects.filter(
-            product=product,
-            order__status='delivered'
-        ).aggregate(Sum('price'))['price__sum'] or 0
-        
-        return Response({
+        data = {
             'product_id': product.id,
             'product_name': product.name,
             'views': product.views,
             'likes': product.likes,
-            'total_sold': total_sold,
-            'revenue': revenue,
+            'total_sold': product.total_sold or 0,
+            'revenue': product.revenue or 0,
             'rating': product.rating,
             'review_count': product.review_count
-        })
+        }
+        
+        if interval:
+            try:
+                start_date = parse_date_param(request.query_params.get('start_date'))
+                end_date = parse_date_param(request.query_params.get('end_date'))
+            except ValueError:
+                return Response(
+                    {'error': 'Invalid date, use YYYY-MM-DD'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            data['series'] = self.product_series(product, interval, start_date, end_date)
+        
+        return Response(data)
+    
+    @action(detail=False, methods=['get'])
+    def logins(self, request):
+        """Login attempts per minute across all workers, exact only with Redis"""
+        try:
+            minutes = min(max(int(request.query_params.get('minutes', 60)), 1), 1440)
+        except ValueError:
+            return Response(
+                {'error': 'minutes must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(login_rates(minutes))
+    
+    def product_series(self, product, interval, start_date, end_date):
+        """Views, likes and units sold per period, grouped in the database"""
+        # Views older than the retention window live in ProductViewDaily
+        sources = {
+            'views': (
+                ProductView.objects.filter(product=product),
+                'viewed_at', Count('id')
+            ),
+            'archived_views': (
+                ProductViewDaily.objects.filter(product=product),
+                'date', Sum('views')
+            ),
+            'likes': (
+                ProductLike.objects.filter(product=product),
+                'created_at', Count('id')
+            ),
+            'units_sold': (
+                OrderItem.objects.filter(product=product, order__status=Order.Status.DELIVERED),
+                'order__created_at', Sum('quantity')
+            ),
+        }
+        
+        # Compare raw timestamps so the (product, viewed_at) index is usable
+        start = end = None
+        if start_date:
+            start = timezone.make_aware(datetime.combine(start_date, time.min))
+        if end_date:
+            end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+        
+        series = {}
+        for metric, (queryset, date_field, aggregate) in sources.items():
+            if date_field == 'date':
+                if start_date:
+                    queryset = queryset.filter(date__gte=start_date)
+                if end_date:
+                    queryset = queryset.filter(date__lte=end_date)
+            else:
+                if start:
+                    queryset = queryset.filter(**{f'{date_field}__gte': start})
+                if end:
+                    queryset = queryset.filter(**{f'{date_field}__lt': end})
+            rows = queryset.annotate(
+                period=Trunc(date_field, interval, output_field=DateField())
+            ).order_by().values('period').annotate(value=aggregate)
+            for row in rows:
+                point = series.setdefault(
+                    row['period'], {'period': row['period'], 'views': 0, 'likes': 0, 'units_sold': 0}
+                )
+                key = 'views' if metric == 'archived_views' else metric
+                point[key] += row['value'] or 0
+        
+        return [series[period] for period in sorted(series)]
@@ -8,6 +8,9 @@ pip install -r requirements.txt
 # Run migrations
 python manage.py migrate
 
+# Catch up on offers that started or ended while nothing was running
+python manage.py sync_offers
+
 # Initialize database with admin user
 python manage.py initdb
 
@@ -0,0 +1,18 @@
+"""
+Gunicorn configuration for jewelry_backend.
+"""
+import os
+
+# GUNICORN_ASGI=True runs uvicorn workers, for serving
+# jewelry_backend.asgi:application with the async catalog and login views
+if os.environ.get('GUNICORN_ASGI', 'False') == 'True':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+
+
+def worker_exit(server, worker):
+    # Views are buffered in each worker's memory, so only the worker itself
+    # can write them out before it goes away. Rolling old views into daily
+    # summaries is left to the separate rollup_product_views worker (see
+    # RENDER_DEPLOYMENT.md), so it runs once rather than in every web instance
+    from api.tracking import view_buffer
+    view_buffer.flush()
@@ -1,5 +1,13 @@
 """
 ASGI config for jewelry_backend project.
+
+Serve it with uvicorn workers (see gunicorn.conf.py):
+
+    GUNICORN_ASGI=True gunicorn jewelry_backend.asgi:application
+
+ASYNC_CATALOG_VIEWS=True serves catalog reads from async views that run
+the DRF viewsets in worker threads, and ASYNC_AUTH_VIEWS=True hashes
+passwords in a bounded thread pool instead of blocking the server.
 """
 
 import os
@@ -4,8 +4,11 @@ Django settings for jewelry_backend project.
 
 from pathlib import Path
 from datetime import timedelta
+from decimal import Decimal
 import os
 
+import dj_database_url
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -68,13 +71,72 @@ TEMPLATES = [
 WSGI_APPLICATION = 'jewelry_backend.wsgi.application'
 
 # Database
+# Configured from DATABASE_URL (Postgres in production), falling back to the
+# local SQLite file. Connections are kept open for CONN_MAX_AGE seconds and
+# health-checked before reuse.
+CONN_MAX_AGE = int(os.environ.get('CONN_MAX_AGE', '600'))
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': dj_database_url.config(
+        default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
+        conn_max_age=CONN_MAX_AGE,
+        conn_health_checks=True,
+    )
 }
 
+# SQLite production tuning for single-node deployments: WAL journaling,
+# synchronous=NORMAL, busy timeout, mmap and page cache on every connection,
+# plus retry-on-lock for the hot write paths.
+SQLITE_TUNING = os.environ.get('SQLITE_TUNING', 'True') == 'True'
+SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', '5000'))  # ms
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))  # bytes
+SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', '-65536'))  # negative = KiB
+SQLITE_LOCK_RETRIES = int(os.environ.get('SQLITE_LOCK_RETRIES', '5'))
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    # Test on a file rather than Django's shared in-memory database, whose
+    # table locks fail at once instead of waiting out busy_timeout, so the
+    # concurrency tests see the same locking as a deployment
+    DATABASES['default']['TEST'] = {'NAME': str(BASE_DIR / 'test_db.sqlite3')}
+
+# Optional read replica for catalog reads, see api.db_routers
+if os.environ.get('DATABASE_REPLICA_URL'):
+    DATABASES['replica'] = dj_database_url.parse(
+        os.environ['DATABASE_REPLICA_URL'],
+        conn_max_age=CONN_MAX_AGE,
+        conn_health_checks=True,
+    )
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    DATABASE_ROUTERS = ['api.db_routers.ReplicaRouter']
+    MIDDLEWARE.append('api.db_routers.ReadAfterWriteMiddleware')
+
+# Seconds a client's reads stay on the primary after it writes. Pins are kept
+# in the cache below, so they hold across workers only with a shared cache
+# (Redis or the database backend, never LocMemCache)
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', '5'))
+
+# Cache
+# Shared by every web worker and the background commands: the catalog cache
+# version, read-after-write pins and auth state only work if all processes
+# see the same entries. REDIS_URL (e.g. a Render Key Value instance) selects
+# Redis; otherwise entries live in a database table, created by migrate
+# (run `createcachetable` when switching back from Redis).
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+            'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', '5000'))},
+        }
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -105,6 +167,12 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Product image derivatives
+# Resized WebP/JPEG copies are rendered right after an image upload is
+# saved. With False, uploads stay fast and the generate_image_derivatives
+# command builds them instead; until then the original file is served.
+IMAGE_DERIVATIVES_ON_UPLOAD = os.environ.get('IMAGE_DERIVATIVES_ON_UPLOAD', 'True') == 'True'
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -116,7 +184,9 @@ CORS_ALLOW_CREDENTIALS = True
 # REST Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication'
+        if os.environ.get('JWT_STATELESS_AUTH', 'False') == 'True'
+        else 'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -143,3 +213,58 @@ SIMPLE_JWT = {
 
 # Custom User Model
 AUTH_USER_MODEL = 'api.User'
+
+# Password hashing
+# PBKDF2 iterations for new hashes (Django's default is 720000). Changing it
+# rehashes each user's password on their next login.
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', '720000'))
+PASSWORD_HASHERS = [
+    'api.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Async login/registration
+# With ASYNC_AUTH_VIEWS=True (meant for ASGI, see jewelry_backend/asgi.py),
+# login and register run in a pool of PASSWORD_HASH_WORKERS threads so a
+# login burst can't tie up the workers serving the catalog.
+ASYNC_AUTH_VIEWS = os.environ.get('ASYNC_AUTH_VIEWS', 'False') == 'True'
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '4'))
+
+# Async catalog reads
+# With ASYNC_CATALOG_VIEWS=True (ASGI only), product list/detail and active
+# offers are served by async views that run the regular DRF viewsets in a
+# worker thread, keeping the event loop free while they query. Measure with
+# benchmark_catalog before enabling: on one core with SQLite, WSGI is faster.
+ASYNC_CATALOG_VIEWS = os.environ.get('ASYNC_CATALOG_VIEWS', 'False') == 'True'
+
+# Log in with either a username or an email address
+AUTHENTICATION_BACKENDS = [
+    'api.backends.EmailOrUsernameBackend',
+]
+
+# Stateless JWT authentication
+# With JWT_STATELESS_AUTH=True, requests are authenticated from the id, role
+# and is_active claims in the access token instead of loading the user row.
+# Deactivation and role changes are still picked up through a per-user state
+# cache that lives for AUTH_STATE_CACHE_SECONDS.
+AUTH_STATE_CACHE_SECONDS = int(os.environ.get('AUTH_STATE_CACHE_SECONDS', '60'))
+
+# Product view tracking
+# Views are buffered in-process and written in batches. Set
+# VIEW_BUFFER_ENABLED=False to write each view synchronously (e.g. in tests).
+VIEW_BUFFER_ENABLED = os.environ.get('VIEW_BUFFER_ENABLED', 'True') == 'True'
+VIEW_BUFFER_SIZE = int(os.environ.get('VIEW_BUFFER_SIZE', '500'))
+VIEW_BUFFER_FLUSH_INTERVAL = float(os.environ.get('VIEW_BUFFER_FLUSH_INTERVAL', '5'))
+
+# Catalog response cache
+# Anonymous product and offer reads are cached for up to this many seconds,
+# and never past the next offer start/end boundary.
+CATALOG_CACHE_TIMEOUT = int(os.environ.get('CATALOG_CACHE_TIMEOUT', '60'))
+
+# Orders
+# Totals are computed server-side; these match the checkout page.
+ORDER_SHIPPING_FEE = Decimal(os.environ.get('ORDER_SHIPPING_FEE', '15.00'))
+ORDER_TAX_RATE = Decimal(os.environ.get('ORDER_TAX_RATE', '0.10'))
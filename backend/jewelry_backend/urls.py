@@ -6,9 +6,14 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from api.media import MODEL_DIR, serve_model
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/v1/', include('api.urls')),
+    # 3D models are served by Django in every environment, with ranges,
+    # ETags and precompressed variants
+    path(f'{settings.MEDIA_URL.strip("/")}/{MODEL_DIR}/<path:name>', serve_model),
 ]
 
 if settings.DEBUG:
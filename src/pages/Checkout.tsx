@@ -67,7 +67,7 @@ export default function Checkout() {
             clearCart();
             navigate('/order-success');
         } catch (err: any) {
-            setError(err.response?.data?.message || 'Failed to place order. Please try again.');
+            setError(err.response?.data?.error || err.response?.data?.message || 'Failed to place order. Please try again.');
         } finally {
             setLoading(false);
         }